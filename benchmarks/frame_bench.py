@@ -0,0 +1,160 @@
+""" Frame-time benchmarks for pygui.
+
+Builds representative view trees in a headless AppContext and reports how
+long event handling, measure, layout and draw take per frame. Each frame
+handles a burst of mouse motion, then measures, lays out and draws the whole
+tree, so the numbers are the cost of a full frame.
+
+Run with: PYTHONPATH=. python3 benchmarks/frame_bench.py [--frames N] [scenario ...]
+"""
+import argparse
+import random
+import statistics
+import time
+
+import pygame
+from pygui import AbsoluteLayout, Activity, AppContext, GridLayout, LinearLayout, TextView, View
+from pygui.guicore import CheckboxView
+
+WIDTH = 1024
+HEIGHT = 768
+
+
+def deep_linear(context):
+    """ 60 levels of nested LinearLayouts with alternating orientation. """
+    root = LinearLayout(context)
+    group = root
+    for depth in range(60):
+        orientation = LinearLayout.HORIZONTAL if depth % 2 else LinearLayout.VERTICAL
+        child = LinearLayout(context, orientation)
+        group.AddChild(TextView(context, f'Level {depth}'))
+        group.AddChild(child)
+        group = child
+    return root
+
+
+def large_grid(context):
+    """ A 50x40 GridLayout of TextViews. """
+    rows, columns = 50, 40
+    grid = GridLayout(context, rows, columns)
+    for i in range(rows * columns):
+        grid.AddChild(TextView(context, str(i)))
+    return grid
+
+
+def absolute_many(context):
+    """ An AbsoluteLayout with 3000 draggable checkboxes. """
+    rng = random.Random(1)
+    layout = AbsoluteLayout(context)
+    for _ in range(3000):
+        view = layout.AddChild(CheckboxView(context))
+        view.SetPosition(rng.randrange(WIDTH - 20), rng.randrange(HEIGHT - 20))
+        view.Movable = True
+    return layout
+
+
+def text_heavy(context):
+    """ 40 rows of 8 TextViews with distinct strings. """
+    root = LinearLayout(context)
+    for row in range(40):
+        line = root.AddChild(LinearLayout(context, LinearLayout.HORIZONTAL))
+        for column in range(8):
+            line.AddChild(TextView(context, f'Item {row}.{column} value={row * column}'))
+    return root
+
+
+SCENARIOS = {
+    'deep_linear': deep_linear,
+    'large_grid': large_grid,
+    'absolute_many': absolute_many,
+    'text_heavy': text_heavy,
+}
+
+
+class BenchActivity(Activity):
+    def __init__(self, context, name, build):
+        super().__init__(context, name)
+        self._build = build
+
+    def OnInit(self):
+        self.SetContentView(self._build(self.Context))
+
+
+class BenchApp(AppContext):
+    def __init__(self):
+        super().__init__(WIDTH, HEIGHT, headless=True)
+
+
+def mark_dirty(view:View):
+    view._layoutDirty = True
+    for child in getattr(view, 'Children', ()):
+        mark_dirty(child)
+
+
+def motion_events(rng, count):
+    return [pygame.event.Event(pygame.MOUSEMOTION,
+                               pos=(rng.randrange(WIDTH), rng.randrange(HEIGHT)),
+                               rel=(1, 1), buttons=(0, 0, 0))
+            for _ in range(count)]
+
+
+def run_scenario(app, name, frames, eventsPerFrame):
+    app.RegisterActivity(BenchActivity(app, name, SCENARIOS[name]))
+    app.StartActivity(name)
+    activity = app.CurrentActivity
+    surface = app.GetSurface()
+    app.StepFrame()
+
+    rng = random.Random(2)
+    timings = {'events': [], 'measure': [], 'layout': [], 'draw': []}
+    for _ in range(frames):
+        events = motion_events(rng, eventsPerFrame)
+        start = time.perf_counter()
+        for event in events:
+            app.OnEvent(event)
+        timings['events'].append(time.perf_counter() - start)
+
+        mark_dirty(activity.ContentView)
+        start = time.perf_counter()
+        activity.ContentView.Measure(None, None)
+        timings['measure'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        activity.ContentView.Layout(0, 0, WIDTH, HEIGHT)
+        timings['layout'].append(time.perf_counter() - start)
+
+        activity.Invalidate()
+        start = time.perf_counter()
+        activity.Render(surface)
+        timings['draw'].append(time.perf_counter() - start)
+    return timings
+
+
+def report(name, timings):
+    print(f'{name}')
+    total = [sum(phase) for phase in zip(*timings.values())]
+    for phase, values in list(timings.items()) + [('frame', total)]:
+        ms = [v * 1000 for v in values]
+        print(f'  {phase:<8} mean {statistics.mean(ms):8.3f} ms  '
+              f'median {statistics.median(ms):8.3f} ms  max {max(ms):8.3f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help='one of ' + ', '.join(SCENARIOS) + '. All by default')
+    parser.add_argument('--frames', type=int, default=30)
+    parser.add_argument('--events', type=int, default=20,
+                        help='mouse motion events per frame')
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f'unknown scenario {name}')
+
+    app = BenchApp()
+    for name in args.scenarios or SCENARIOS:
+        report(name, run_scenario(app, name, args.frames, args.events))
+
+
+if __name__ == '__main__':
+    main()
@@ -17,11 +17,12 @@ def get_event_loop():
 class CustomView(View):
     def __init__(self, context):
         super().__init__(context)
+        self.SetDisplayListEnabled(True)
 
     def OnMeasure(self, wSpec, hSpec):
         self.SetMeasuredDimension(50, 50)
 
-    def Draw(self, surface):
+    def OnDraw(self, surface):
         self.FillSelf(surface, (128, 0, 128))
         self.DrawLine(surface, (128, 255, 0), (1, 1), (self.Rect.width - 2, self.Rect.height - 2), 2)
         self.DrawRect(surface, (255, 255, 0), (0, 0, self.Rect.width, self.Rect.height), 2)
@@ -62,11 +63,9 @@ class ExampleApp(AppContext):
     def __init__(self, width, height):
         super().__init__(width, height)
 
-        mainActivity = MainActivity(self, 'MainActivity')
-        otherActivity = OtherActivity(self, "OtherActivity")
-
-        self.RegisterActivity(mainActivity)
-        self.RegisterActivity(otherActivity)
+        # Activities are created when they are first started
+        self.RegisterActivityFactory('MainActivity', MainActivity)
+        self.RegisterActivityFactory('OtherActivity', OtherActivity)
 
         self.StartActivity('MainActivity')
         
@@ -1,3 +1,43 @@
 # Functions
-from .guicore import AbsoluteLayout, Activity, AppContext, ButtonView, Dimension, DragInfo, GridLayout, \
-    ImageView, LinearLayout, SetGraphicsPath, TextInputView, TextView, View, ViewGroup
+# The names are imported from their modules on first use, so that importing
+# pygui does not load pygame and all of guicore up front.
+import importlib
+
+_EXPORTS = {
+    'AbsoluteLayout': 'guicore',
+    'Activity': 'guicore',
+    'AppContext': 'guicore',
+    'ButtonView': 'guicore',
+    'Dimension': 'guicore',
+    'DragInfo': 'guicore',
+    'GridLayout': 'guicore',
+    'ImageView': 'guicore',
+    'LinearLayout': 'guicore',
+    'ListAdapter': 'guicore',
+    'ListView': 'guicore',
+    'ScrollView': 'guicore',
+    'SetGraphicsPath': 'guicore',
+    'TextInputView': 'guicore',
+    'TextView': 'guicore',
+    'View': 'guicore',
+    'ViewGroup': 'guicore',
+    'CompileLayout': 'layouts',
+    'LayoutError': 'layouts',
+    'LayoutTemplate': 'layouts',
+    'LoadLayout': 'layouts',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
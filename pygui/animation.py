@@ -0,0 +1,240 @@
+from __future__ import annotations
+import time
+
+# NumPy is slow to import, so it is only imported once an Animator wants it
+np = None
+
+def _import_numpy() -> bool:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+# The easing curves are polynomials, so they work on floats and NumPy arrays
+def Linear(t):
+    return t
+
+def EaseIn(t):
+    return t * t
+
+def EaseOut(t):
+    return t * (2 - t)
+
+def EaseInOut(t):
+    return t * t * (3 - 2 * t)
+
+LINEAR = 0
+EASE_IN = 1
+EASE_OUT = 2
+EASE_IN_OUT = 3
+EASINGS = (Linear, EaseIn, EaseOut, EaseInOut)
+
+POSITION = 'position'
+SIZE = 'size'
+BACKGROUND_COLOR = 'background_color'
+TEXT_COLOR = 'text_color'
+ALPHA = 'alpha'
+
+# Every animation has this many float channels, unused ones stay zero
+CHANNELS = 4
+
+
+def _get_position(view):
+    return view.Rect.topleft
+
+def _set_position(view, values):
+    view.SetPosition(int(round(values[0])), int(round(values[1])))
+
+def _get_size(view):
+    return view.Rect.size
+
+def _set_size(view, values):
+    view.SetSize(int(round(values[0])), int(round(values[1])))
+
+def _get_background_color(view):
+    return view.BackgroundColor
+
+def _set_background_color(view, values):
+    view.SetBackgroundColor(tuple(int(round(v)) for v in values[:3]))
+
+def _get_text_color(view):
+    return view.TextColor
+
+def _set_text_color(view, values):
+    view.TextColor = tuple(int(round(v)) for v in values[:3])
+    view.Invalidate()
+
+def _get_alpha(view):
+    return (view.Alpha,)
+
+def _set_alpha(view, values):
+    view.SetAlpha(int(round(values[0])))
+
+PROPERTIES = {
+    POSITION: (_get_position, _set_position),
+    SIZE: (_get_size, _set_size),
+    BACKGROUND_COLOR: (_get_background_color, _set_background_color),
+    TEXT_COLOR: (_get_text_color, _set_text_color),
+    ALPHA: (_get_alpha, _set_alpha),
+}
+
+
+def _attribute_property(name):
+    # Any other property name animates a float attribute of the view
+    def get(view):
+        return (getattr(view, name),)
+
+    def set(view, values):
+        setattr(view, name, values[0])
+        view.Invalidate()
+    return get, set
+
+
+class Animation:
+    """ Handle of a running animation. """
+    def __init__(self, animator, view, prop, setter, start, end, startTime, duration, easing, onDone):
+        self.Animator = animator
+        self.View = view
+        self.Property = prop
+        self.Setter = setter
+        self.Start = start
+        self.End = end
+        self.StartTime = startTime
+        self.Duration = duration
+        self.Easing = easing
+        self.OnDone = onDone
+        self.Finished = False
+
+    def Cancel(self):
+        self.Animator.Cancel(self)
+
+
+class Animator:
+    """ Drives property animations once per frame. The animations are kept as
+    columns of start values, end values, start times, durations and easing
+    curves, and the eased values of all animations are computed in one batch,
+    with NumPy when it is available. The results are then applied through the
+    view setters, which invalidate the affected views. """
+    def __init__(self, context, useNumpy=True):
+        self.Context = context
+        self.UseNumpy = useNumpy and _import_numpy()
+        self._animations:list[Animation] = []
+        self._columns = None
+        self._byTarget = {}
+
+    def __len__(self):
+        return len(self._animations)
+
+    def Animate(self, view, prop, to, duration=0.25, easing=EASE_IN_OUT, start=None,
+                onDone=None) -> Animation:
+        """ Animates a property of a view from its current value, or from start,
+        to the value to over duration seconds. prop is one of POSITION, SIZE,
+        BACKGROUND_COLOR, TEXT_COLOR and ALPHA, or the name of a float attribute
+        of the view. A running animation of the same property is replaced. """
+        getter, setter = PROPERTIES.get(prop) or _attribute_property(prop)
+        if start is None:
+            start = getter(view)
+        if not isinstance(to, (tuple, list)):
+            to = (to,)
+        start = tuple(float(v) for v in start) + (0.0,) * (CHANNELS - len(start))
+        to = tuple(float(v) for v in to) + (0.0,) * (CHANNELS - len(to))
+
+        animation = Animation(self, view, prop, setter, start, to, time.monotonic(),
+                              max(duration, 1e-6), easing, onDone)
+        previous = self._byTarget.get((id(view), prop))
+        if previous is not None:
+            # Continuous rendering goes on, as the number of animations stays the same
+            self._remove(previous)
+        elif not self._animations:
+            self.Context.BeginContinuousRendering()
+        self._animations.append(animation)
+        self._byTarget[(id(view), prop)] = animation
+        self._columns = None
+        return animation
+
+    def Cancel(self, animation:Animation):
+        """ Stops the animation where it is, without calling OnDone. """
+        if not animation.Finished:
+            self._remove(animation)
+            if not self._animations:
+                self.Context.EndContinuousRendering()
+
+    def CancelAll(self, view=None):
+        for animation in list(self._animations):
+            if view is None or animation.View is view:
+                self.Cancel(animation)
+
+    def _remove(self, animation):
+        animation.Finished = True
+        self._animations.remove(animation)
+        self._byTarget.pop((id(animation.View), animation.Property), None)
+        self._columns = None
+
+    def _build_columns(self):
+        animations = self._animations
+        starts = [a.Start for a in animations]
+        ends = [a.End for a in animations]
+        startTimes = [a.StartTime for a in animations]
+        durations = [a.Duration for a in animations]
+        easings = [a.Easing for a in animations]
+        if self.UseNumpy:
+            starts = np.array(starts, dtype=float)
+            ends = np.array(ends, dtype=float)
+            self._columns = (starts, ends - starts, np.array(startTimes),
+                             np.array(durations), np.array(easings))
+        else:
+            deltas = [tuple(e - s for s, e in zip(start, end)) for start, end in zip(starts, ends)]
+            self._columns = (starts, deltas, startTimes, durations, easings)
+
+    def _evaluate(self, now):
+        starts, deltas, startTimes, durations, easings = self._columns
+        if self.UseNumpy:
+            t = np.clip((now - startTimes) / durations, 0.0, 1.0)
+            eased = np.empty_like(t)
+            for easing, curve in enumerate(EASINGS):
+                mask = easings == easing
+                if mask.any():
+                    eased[mask] = curve(t[mask])
+            values = starts + deltas * eased[:, None]
+            return values.tolist(), (t >= 1.0).tolist()
+
+        values = []
+        done = []
+        for start, delta, startTime, duration, easing in zip(starts, deltas, startTimes,
+                                                             durations, easings):
+            t = min(1.0, max(0.0, (now - startTime) / duration))
+            e = EASINGS[easing](t)
+            values.append([s + d * e for s, d in zip(start, delta)])
+            done.append(t >= 1.0)
+        return values, done
+
+    def Step(self, now=None):
+        """ Advances all animations to the time now and applies the values.
+        Called by AppContext at the start of each frame. """
+        if not self._animations:
+            return
+        if now is None:
+            now = time.monotonic()
+        if self._columns is None:
+            self._build_columns()
+        animations = list(self._animations)
+        values, done = self._evaluate(now)
+        finished = []
+        for animation, value, isDone in zip(animations, values, done):
+            animation.Setter(animation.View, value)
+            if isDone:
+                finished.append(animation)
+
+        for animation in finished:
+            if not animation.Finished:
+                self._remove(animation)
+        if finished and not self._animations:
+            self.Context.EndContinuousRendering()
+        for animation in finished:
+            if animation.OnDone is not None:
+                animation.OnDone(animation)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+from collections import OrderedDict
+import logging
+import threading
+import pygame
+
+
+def _convert(surface:pygame.Surface) -> pygame.Surface:
+    # Converting to the display pixel format makes blits cheaper, but needs a
+    # display
+    if pygame.display.get_surface() is None:
+        return surface
+    if surface.get_alpha() is not None or surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+
+class AssetCache:
+    """ Process wide cache of decoded images keyed by path. Images are decoded
+    once and converted to the display pixel format. Users acquire and release
+    images; an image nobody holds stays cached until the byte budget is
+    exceeded, then the least recently released images are evicted.
+
+    Images can also be loaded on a thread pool with LoadAsync. The callbacks are
+    run on the main thread from DeliverLoaded, which AppContext calls at the
+    start of each frame. """
+    def __init__(self, maxBytes=64 * 1024 * 1024, workers=2):
+        self.MaxBytes = maxBytes
+        self.Bytes = 0
+        self.Hits = 0
+        self.Misses = 0
+        self._workers = workers
+        self._executor = None
+        self._images = {}
+        self._refs = {}
+        self._unused = OrderedDict()
+        self._loading = {}
+        self._loaded = []
+        self._lock = threading.Lock()
+
+    def __contains__(self, path):
+        return path in self._images
+
+    def _store(self, path, surface):
+        surface = _convert(surface)
+        nbytes = surface.get_pitch() * surface.get_height()
+        self._images[path] = (surface, nbytes)
+        self._refs[path] = 0
+        self._unused[path] = None
+        self.Bytes += nbytes
+        return surface
+
+    def Acquire(self, path) -> pygame.Surface:
+        """ Returns the image, decoding it if it is not cached, and takes a
+        reference to it. """
+        entry = self._images.get(path)
+        if entry is None:
+            self.Misses += 1
+            self._store(path, pygame.image.load(path))
+        else:
+            self.Hits += 1
+        return self._take(path)
+
+    def _take(self, path) -> pygame.Surface:
+        surface = self._images[path][0]
+        self._refs[path] += 1
+        self._unused.pop(path, None)
+        self._evict()
+        return surface
+
+    def Release(self, path):
+        """ Drops a reference taken by Acquire or by a LoadAsync callback. """
+        refs = self._refs.get(path)
+        if not refs:
+            return
+        self._refs[path] = refs - 1
+        if refs == 1:
+            self._unused[path] = None
+            self._evict()
+
+    def _evict(self):
+        while self.Bytes > self.MaxBytes and self._unused:
+            path, _ = self._unused.popitem(last=False)
+            _, nbytes = self._images.pop(path)
+            del self._refs[path]
+            self.Bytes -= nbytes
+
+    def LoadAsync(self, path, callback):
+        """ Decodes the image in the background and calls callback(surface) on
+        the main thread once it is ready, with a reference taken for the
+        callback. If the image is cached the callback is run right away. If the
+        image cannot be loaded the callback gets None. """
+        if path in self._images:
+            callback(self.Acquire(path))
+            return
+        callbacks = self._loading.get(path)
+        if callbacks is not None:
+            callbacks.append(callback)
+            return
+        self._loading[path] = [callback]
+        if self._executor is None:
+            # Imported here because it is slow to import and often not needed
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix='pygui-assets')
+        self._executor.submit(self._decode, path)
+
+    def _decode(self, path):
+        try:
+            surface = pygame.image.load(path)
+        except (pygame.error, OSError) as e:
+            logging.error(f'Could not load image "{path}": {e}')
+            surface = None
+        with self._lock:
+            self._loaded.append((path, surface))
+
+    def IsLoading(self) -> bool:
+        return bool(self._loading)
+
+    def DeliverLoaded(self):
+        """ Stores the images decoded in the background and runs their callbacks.
+        Must be called on the main thread. """
+        if not self._loaded:
+            return
+        with self._lock:
+            loaded = self._loaded
+            self._loaded = []
+        for path, surface in loaded:
+            callbacks = self._loading.pop(path, [])
+            if surface is None:
+                for callback in callbacks:
+                    callback(None)
+                continue
+            self.Misses += 1
+            if path not in self._images:
+                self._store(path, surface)
+            for callback in callbacks:
+                callback(self._take(path))
+
+    def GetStats(self) -> dict:
+        return {'images': len(self._images),
+                'unused': len(self._unused),
+                'bytes': self.Bytes,
+                'max_bytes': self.MaxBytes,
+                'hits': self.Hits,
+                'misses': self.Misses,
+                'loading': len(self._loading)}
+
+
+_assetCache = AssetCache()
+
+def GetAssetCache() -> AssetCache:
+    return _assetCache
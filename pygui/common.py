@@ -1,16 +1,41 @@
 from __future__ import annotations
+import os
+
+
+def GetCacheDir() -> str:
+    """ Directory where pygui keeps data between runs. """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'pygui')
+
 
 class Point:
+    __slots__ = ('X', 'Y')
+
     @classmethod
     def FromTuple(cls, tup) -> Point:
-        return Point(tup[0], tup[1])
+        return Point.FromXY(tup[0], tup[1])
 
     @classmethod
     def Copy(cls, point) -> Point:
-        return Point(point.X, point.Y)
+        return Point.FromXY(point.X, point.Y)
+
+    @classmethod
+    def FromXY(cls, x, y) -> Point:
+        """ Creates a point without checking the arguments. """
+        point = object.__new__(cls)
+        point.X = x
+        point.Y = y
+        return point
 
     def __init__(self, *args):
-        if len(args) == 0:
+        if len(args) == 2:
+            x, y = args
+            if isinstance(x, (int, float)) and isinstance(y, (int, float)):
+                self.X = x
+                self.Y = y
+            else:
+                raise TypeError()
+        elif len(args) == 0:
             self.X = 0
             self.Y = 0
         elif len(args) == 1 and isinstance(args[0], Point):
@@ -19,10 +44,6 @@ class Point:
         elif len(args) == 1 and isinstance(args[0], (tuple, list)) and len(args[0]) == 2:
             self.X = args[0][0]
             self.Y = args[0][1]
-        elif len(args) == 2 and (isinstance(args[0], int) or isinstance(args[0], float)) \
-            and (isinstance(args[1], int) or isinstance(args[1], float)):
-            self.X = args[0]
-            self.Y = args[1]
         else:
             raise TypeError()
 
@@ -48,13 +69,13 @@ class Point:
         return self.X == other.X and self.Y == other.Y
 
     def __sub__(self, other) -> Point:
-        return Point(self.X - other.X, self.Y - other.Y)
+        return Point.FromXY(self.X - other.X, self.Y - other.Y)
 
     def __add__(self, other) -> Point:
-        return Point(self.X + other.X, self.Y + other.Y)
+        return Point.FromXY(self.X + other.X, self.Y + other.Y)
     
     def __mul__(self, scalar) -> Point:
-        return Point(self.X * scalar, self.Y * scalar)
+        return Point.FromXY(self.X * scalar, self.Y * scalar)
 
     def __repr__(self):
         return f'<Point({self.X}, {self.Y})>'
@@ -0,0 +1,178 @@
+from __future__ import annotations
+from collections import OrderedDict
+import atexit
+import json
+import logging
+import os
+import pygame
+from .common import GetCacheDir
+
+
+class FontRegistry:
+    """ Creates and caches the fonts used by pygui.
+
+    Looking up a system font by name makes pygame scan the installed fonts,
+    which is slow. The font files found for each (name, bold, italic) are
+    therefore kept in a JSON file between runs, and fonts are created from the
+    file directly when the name is known.
+
+    Font objects are kept in an LRU cache that starts with room for minFonts
+    fonts. When a font that was evicted is asked for again the cache was too
+    small for the fonts in use, so it grows, up to maxFonts. Preloaded fonts
+    are never evicted. """
+    VERSION = 1
+
+    def __init__(self, cachePath=None, minFonts=32, maxFonts=256):
+        if cachePath is None:
+            cachePath = os.path.join(GetCacheDir(), 'fonts.json')
+        self.CachePath = cachePath
+        self.Capacity = minFonts
+        self.MaxFonts = maxFonts
+        self.Hits = 0
+        self.Misses = 0
+        self.Evictions = 0
+        self.Rebuilds = 0
+        self.PathHits = 0
+        self.PathMisses = 0
+        self._fonts = OrderedDict()
+        self._evicted = OrderedDict()
+        self._pinned = set()
+        self._paths = None
+        self._pathsDirty = False
+
+    def __len__(self):
+        return len(self._fonts)
+
+    def _load_paths(self):
+        self._paths = {}
+        try:
+            with open(self.CachePath) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != self.VERSION or data.get('pygame') != pygame.version.ver:
+            return
+        for key, entry in data.get('fonts', {}).items():
+            # Skip fonts that have been removed since
+            if entry[0] is None or os.path.exists(entry[0]):
+                self._paths[key] = tuple(entry)
+
+    def SavePaths(self):
+        """ Writes the font files found since the last save to the path cache.
+        Called after Preload and when the interpreter exits. """
+        if not self._pathsDirty:
+            return
+        self._pathsDirty = False
+        data = {'version': self.VERSION,
+                'pygame': pygame.version.ver,
+                'fonts': self._paths}
+        try:
+            os.makedirs(os.path.dirname(self.CachePath), exist_ok=True)
+            temp = self.CachePath + '.tmp'
+            with open(temp, 'w') as f:
+                json.dump(data, f)
+            os.replace(temp, self.CachePath)
+        except OSError as e:
+            logging.debug(f'Could not write font cache "{self.CachePath}": {e}')
+
+    def ResolvePath(self, name, bold, italic) -> tuple:
+        """ Returns (path, fake bold, fake italic) for a system font, the way
+        pygame.font.SysFont would pick it. The path is None when the font is
+        not installed and the default font is used. """
+        if self._paths is None:
+            self._load_paths()
+        key = f'{name}|{int(bold)}|{int(italic)}'
+        entry = self._paths.get(key)
+        if entry is not None:
+            self.PathHits += 1
+            return entry
+
+        self.PathMisses += 1
+        path = pygame.font.match_font(name, bold, italic)
+        fakeBold = fakeItalic = False
+        if path is None:
+            fakeBold, fakeItalic = bold, italic
+        elif bold or italic:
+            # Without a styled file SysFont styles the regular one
+            plain = pygame.font.match_font(name)
+            if path == plain:
+                fakeBold, fakeItalic = bold, italic
+        entry = (path, fakeBold, fakeItalic)
+        self._paths[key] = entry
+        if not self._pathsDirty:
+            self._pathsDirty = True
+            atexit.register(self.SavePaths)
+        return entry
+
+    def _create(self, name, size, bold, italic) -> pygame.font.Font:
+        path, fakeBold, fakeItalic = self.ResolvePath(name, bold, italic)
+        try:
+            font = pygame.font.Font(path, size)
+        except (OSError, pygame.error):
+            font = pygame.font.Font(None, size)
+            fakeBold, fakeItalic = bold, italic
+        font.set_bold(fakeBold)
+        font.set_italic(fakeItalic)
+        return font
+
+    def GetFont(self, name, size, bold, italic) -> pygame.font.Font:
+        key = (name, size, bold, italic)
+        font = self._fonts.get(key)
+        if font is not None:
+            self._fonts.move_to_end(key)
+            self.Hits += 1
+            return font
+
+        self.Misses += 1
+        if self._evicted.pop(key, None) is not None:
+            # The font was needed again after being evicted
+            self.Rebuilds += 1
+            self.Capacity = min(self.MaxFonts, self.Capacity * 2)
+        font = self._create(name, size, bold, italic)
+        self._fonts[key] = font
+        self._evict()
+        return font
+
+    def _evict(self):
+        while len(self._fonts) > self.Capacity + len(self._pinned):
+            for key in self._fonts:
+                if key not in self._pinned:
+                    break
+            else:
+                return
+            del self._fonts[key]
+            self.Evictions += 1
+            self._evicted[key] = True
+            if len(self._evicted) > self.MaxFonts:
+                self._evicted.popitem(last=False)
+
+    def Preload(self, fonts):
+        """ Creates a set of fonts ahead of time and keeps them. Each font is a
+        tuple (name, size) or (name, size, bold, italic). """
+        for font in fonts:
+            name, size, bold, italic = (tuple(font) + (False, False))[:4]
+            self.GetFont(name, size, bold, italic)
+            self._pinned.add((name, size, bold, italic))
+        self.SavePaths()
+
+    def Clear(self):
+        self._fonts.clear()
+        self._evicted.clear()
+        self._pinned.clear()
+
+    def GetStats(self) -> dict:
+        return {'fonts': len(self._fonts),
+                'capacity': self.Capacity,
+                'pinned': len(self._pinned),
+                'hits': self.Hits,
+                'misses': self.Misses,
+                'evictions': self.Evictions,
+                'rebuilds': self.Rebuilds,
+                'path_hits': self.PathHits,
+                'path_misses': self.PathMisses}
+
+
+_fontRegistry = FontRegistry()
+
+def GetFontRegistry() -> FontRegistry:
+    return _fontRegistry
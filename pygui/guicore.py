@@ -1,9 +1,25 @@
 from __future__ import annotations
 from .colors import *
+from .animation import Animator
+from .assets import GetAssetCache
 from .common import Point
-from functools import lru_cache
+from .fonts import GetFontRegistry
+from .profiler import FrameProfiler
+from .spatial import SpatialGrid
+from .text import GetGlyphAtlas, GetGlyphMetrics, MeasureText, RenderText, WrappedText
+from .textbuffer import GapBuffer
+import asyncio
+from contextlib import nullcontext
+import heapq
+import importlib
+from itertools import accumulate
+import json
 import logging
+import os
 from os.path import join
+import time
+import weakref
+import zlib
 from pgapp import PgApp
 import pygame
 
@@ -28,19 +44,21 @@ def SurfaceToString(surface):
                                  surface.get_pitch())
 
 class Dimension:
+    __slots__ = ('_width', '_height')
+
     def __init__(self, *args):
         self.set(*args)
 
     def set(self, *args):
-        if len(args) == 1 and isinstance(args[0], Dimension):
+        if len(args) == 2:
+            self._width = args[0]
+            self._height = args[1]
+        elif len(args) == 1 and isinstance(args[0], Dimension):
             self._width = args[0]._width
             self._height = args[0]._height
         elif len(args) == 1 and isinstance(args[0], tuple):
             self._width = args[0][0]
             self._height = args[0][1]            
-        elif len(args) == 2:
-            self._width = args[0]
-            self._height = args[1]
         else:
             self._width = 0
             self._height = 0
@@ -74,6 +92,8 @@ class Dimension:
         return f'<Dimension {self._width}, {self._height}>'
 
 class MeasureSpec:
+    __slots__ = ('Mode', 'Size')
+
     UNSPECIFIED = 1
     EXACTLY = 2
     AT_MOST = 3
@@ -95,6 +115,14 @@ class MeasureSpec:
         text += str(self.Size)
         return text
 
+    def __eq__(self, other):
+        if not isinstance(other, MeasureSpec):
+            return False
+        return self.Mode == other.Mode and self.Size == other.Size
+
+    def __hash__(self):
+        return hash((self.Mode, self.Size))
+
     def GetSize(self):
         return self.Size
 
@@ -111,19 +139,141 @@ def args_to_point(*args):
         return Point(args[0], args[1])
 
 
-# Creating a font object is expensive, so cache the result
-@lru_cache(maxsize=32)
-def GetFont(name, size, bold, italic):
-    return pygame.font.SysFont(name, size, bold, italic)
-
-
 def OnClickDoNothing(pos, view:View, button:int):
     pass
 
 
-def MeasureText(text, name, size, bold, italic):
-    font = GetFont(name, size, bold, italic)
-    return font.size(text)
+# Kinds of recorded draw commands
+_LINE = 0
+_RECT = 1
+_BLIT = 2
+_GLYPHS = 3
+
+def _translate_command(command, dx, dy):
+    kind = command[0]
+    if kind == _LINE:
+        _, color, start, end, width = command
+        return (kind, color, (start[0] + dx, start[1] + dy), (end[0] + dx, end[1] + dy), width)
+    if kind == _RECT:
+        _, color, rect, width = command
+        return (kind, color, (rect[0] + dx, rect[1] + dy, rect[2], rect[3]), width)
+    if kind == _BLIT:
+        _, source, pos = command
+        return (kind, source, (pos[0] + dx, pos[1] + dy))
+    _, glyphs, pos, text = command
+    return (kind, glyphs, (pos[0] + dx, pos[1] + dy), text)
+
+
+# Views are drawn clipped to the dirty rects, to a part of a ScrollView's
+# backing surface, or scrolled out of it. pygame.draw.line picks other pixels
+# for a line cut by the clip than for the whole line, so a line that is cut is
+# drawn whole into a surface of its own and blitted, which clips exactly.
+def _draw_line(surface, color, start, end, width):
+    left = int(min(start[0], end[0])) - width - 1
+    top = int(min(start[1], end[1])) - width - 1
+    bounds = pygame.Rect(left, top,
+                         int(max(start[0], end[0])) + width + 2 - left,
+                         int(max(start[1], end[1])) + width + 2 - top)
+    clip = surface.get_clip()
+    if clip.contains(bounds):
+        pygame.draw.line(surface, color, start, end, width)
+        return
+    if not clip.colliderect(bounds):
+        return
+    alpha = surface.get_flags() & pygame.SRCALPHA
+    line = pygame.Surface(bounds.size, alpha, surface)
+    if alpha:
+        line.fill((0, 0, 0, 0))
+    else:
+        key = (255, 0, 255) if line.map_rgb(color) != line.map_rgb((255, 0, 255)) else (0, 255, 0)
+        line.fill(key)
+        line.set_colorkey(key)
+    pygame.draw.line(line, color, (start[0] - left, start[1] - top),
+                     (end[0] - left, end[1] - top), width)
+    surface.blit(line, bounds.topleft)
+
+
+# Some pygame versions draw an outline cut by the clip with an edge along the
+# clip, so such outlines are filled as four bars.
+def _draw_rect(surface, color, rect, width):
+    rect = pygame.Rect(rect)
+    if width <= 0 or width * 2 >= rect.width or width * 2 >= rect.height:
+        surface.fill(color, rect)
+        return
+    if surface.get_clip().contains(rect):
+        pygame.draw.rect(surface, color, rect, width)
+        return
+    inner = rect.height - 2 * width
+    surface.fill(color, (rect.left, rect.top, rect.width, width))
+    surface.fill(color, (rect.left, rect.bottom - width, rect.width, width))
+    surface.fill(color, (rect.left, rect.top + width, width, inner))
+    surface.fill(color, (rect.right - width, rect.top + width, width, inner))
+
+
+def CoalesceRects(rects, bounds=None):
+    """ Merges overlapping rectangles so that each region is only redrawn once.
+    If bounds is given the result is clipped to it and empty rects dropped. """
+    result = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        if bounds is not None:
+            rect = rect.clip(bounds)
+        if rect.width <= 0 or rect.height <= 0:
+            continue
+        i = rect.collidelist(result)
+        while i != -1:
+            rect.union_ip(result.pop(i))
+            i = rect.collidelist(result)
+        result.append(rect)
+    return result
+
+
+def _merge_motion(first, last):
+    attrs = dict(last.dict)
+    firstRel = getattr(first, 'rel', (0, 0))
+    lastRel = getattr(last, 'rel', (0, 0))
+    attrs['rel'] = (firstRel[0] + lastRel[0], firstRel[1] + lastRel[1])
+    return pygame.event.Event(pygame.MOUSEMOTION, attrs)
+
+
+# Returns the motion events between a button press and its release. Such a
+# press, drag and release needs its motion to begin and move the drag.
+def _drag_motion(events) -> set:
+    kept = set()
+    down = None
+    for i, event in enumerate(events):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            down = i
+        elif event.type == pygame.MOUSEBUTTONUP and down is not None:
+            kept.update(id(e) for e in events[down + 1:i] if e.type == pygame.MOUSEMOTION)
+            down = None
+    return kept
+
+
+def CoalesceEvents(events, maxEvents=None):
+    """ Merges runs of consecutive MOUSEMOTION events into one event at the
+    latest position, with the relative motion summed. Other events are kept in
+    their original order. If more than maxEvents remain, all motion events but
+    the last are dropped. Motion between a button press and its release in the
+    same batch is kept as it is, so that a quick drag still moves. """
+    kept = _drag_motion(events)
+    result = []
+    for event in events:
+        if event.type == pygame.MOUSEMOTION and id(event) not in kept and result and \
+            result[-1].type == pygame.MOUSEMOTION and id(result[-1]) not in kept:
+            result[-1] = _merge_motion(result[-1], event)
+        else:
+            result.append(event)
+
+    if maxEvents is not None and len(result) > maxEvents:
+        lastMotion = None
+        for event in reversed(result):
+            if event.type == pygame.MOUSEMOTION:
+                lastMotion = event
+                break
+        result = [event for event in result
+                  if event.type != pygame.MOUSEMOTION or event is lastMotion or id(event) in kept]
+    return result
 
 
 class LayoutParams:
@@ -150,6 +300,18 @@ class LayoutParams:
 
 
 class View:
+    # Views are plentiful, so keep their attributes in slots. Subclasses that
+    # do not declare __slots__ still get a __dict__ for their own attributes.
+    __slots__ = ('Context', 'Parent', 'Rect', 'BackgroundColor', 'Movable',
+                 'Focus', 'Focusable', 'ClickAction', 'LayoutParams',
+                 'MeasuredDimension', 'Visible', 'MinDimension', 'Margin',
+                 'BorderWidthTop', 'BorderWidthBottom', 'BorderWidthLeft',
+                 'BorderWidthRight', 'BorderWidthColor', 'Padding', 'Active',
+                 '_layoutDirty', '_measureSpecs', '_layoutArgs',
+                 '_layerEnabled', '_layerTransparent', '_layer', '_layerValid',
+                 'Alpha', '_displayListEnabled', '_displayList',
+                 '_displayListOrigin', '_recording', '__weakref__')
+
     def __init__(self, context:AppContext):
         self.Context:AppContext = context
         self.Parent:View = None
@@ -171,31 +333,231 @@ class View:
         self.BorderWidthColor = (0, 0, 0)
         self.Padding = 0
         self.Active = True
+        # Set when the view needs a new measure and layout pass. The specs and
+        # arguments of the last pass let clean subtrees be skipped.
+        self._layoutDirty = True
+        self._measureSpecs = None
+        self._layoutArgs = None
+        # Offscreen copy of the drawn view when it is drawn as a layer
+        self._layerEnabled = False
+        self._layerTransparent = False
+        self._layer:pygame.Surface = None
+        self._layerValid = False
+        self.Alpha = 255
+        # Recorded draw commands, replayed until the view is invalidated
+        self._displayListEnabled = False
+        self._displayList = None
+        self._displayListOrigin = (0, 0)
+        self._recording = None
+
+    def Invalidate(self, rect=None):
+        """ Marks a region of the view as in need of redrawing. Coordinates are
+        relative to the top left corner of the view. Without a rect the whole
+        view is invalidated. """
+        self._displayList = None
+        self._invalidate_region(rect)
+
+    # Do not override. Like Invalidate, but for when the view has only moved,
+    # so that its display list stays valid.
+    def _invalidate_region(self, rect=None):
+        if rect is None:
+            dirty = pygame.Rect(self.Rect)
+        else:
+            dirty = pygame.Rect(self._offset(rect))
+        if self._layerEnabled:
+            self._layer_invalidated(dirty)
+        self._invalidate_above(dirty)
+
+    # Do not override. Tells the layers above the view and the context that a
+    # rect of the window has to be redrawn.
+    def _invalidate_above(self, dirty):
+        view = self.Parent
+        while view is not None:
+            if view._layerEnabled:
+                dirty = view._child_invalidated(dirty)
+                if dirty is None:
+                    return
+            view = view.Parent
+        if self.Context is not None:
+            self.Context.Invalidate(dirty)
+
+    # Called when something inside a view drawn as a layer changed
+    def _layer_invalidated(self, rect):
+        self._layerValid = False
+
+    # Called with the changed rect of a view below one drawn as a layer.
+    # Returns the rect in the coordinates of the parent, or None when none
+    # of it is shown.
+    def _child_invalidated(self, rect):
+        self._layer_invalidated(rect)
+        return rect
+
+    def RequestLayout(self):
+        """ Marks the view and all its ancestors as in need of a new measure and
+        layout pass. Views outside that path keep their cached results. """
+        view = self
+        while view is not None:
+            view._layoutDirty = True
+            view = view.Parent
+        if self.Context is not None:
+            self.Context.RequestLayout()
+
+    # Do not override. Tells if the view can draw anything inside rect.
+    def _intersects(self, rect) -> bool:
+        return self.Rect.colliderect(rect)
+
+    def GetBounds(self) -> pygame.Rect:
+        """ Returns the rectangle covering everything the view draws. """
+        return self.Rect
+
+    def SetLayerEnabled(self, enabled, transparent=False):
+        """ Draws the view, and all its children, once into an offscreen surface
+        that is then blitted every frame until something in it is invalidated.
+        Suits static parts of the screen like toolbars and side panels. The
+        layer is clipped to the view's rect. An opaque layer is filled with the
+        activity background, a transparent one shows what is behind it. """
+        self._layerEnabled = enabled
+        self._layerTransparent = transparent
+        self._layer = None
+        self._layerValid = False
+        if self.Parent is not None:
+            # A layer does not draw outside the view, which changes the
+            # bounds of the parents
+            self.Parent._bounds_changed()
+        self.Invalidate()
+
+    def SetAlpha(self, alpha):
+        """ Sets the opacity of the view, 0 to 255. A view that is not fully
+        opaque is drawn as a transparent layer, so that what is behind it shows
+        through. """
+        self.Alpha = alpha
+        if alpha < 255 and not (self._layerEnabled and self._layerTransparent):
+            self.SetLayerEnabled(True, transparent=True)
+        else:
+            self.Invalidate()
 
+    # Do not override. Moves the rect of the view and its children without
+    # invalidating anything.
+    def _translate(self, dx, dy):
+        self.Rect.move_ip(dx, dy)
+        if self._layoutArgs is not None:
+            left, top, width, height = self._layoutArgs
+            self._layoutArgs = (left + dx, top + dy, width, height)
+
+    # Do not override
+    def _draw_layer(self, surface):
+        left, top = self.Rect.topleft
+        size = self.Rect.size
+        if size[0] <= 0 or size[1] <= 0:
+            return
+        if self._layer is None or self._layer.get_size() != size:
+            flags = pygame.SRCALPHA if self._layerTransparent else 0
+            self._layer = pygame.Surface(size, flags)
+            self._layerValid = False
+        if not self._layerValid:
+            self._layer.fill((0, 0, 0, 0) if self._layerTransparent else GRAY_50)
+            # Draw the subtree the ordinary way, moved to the layer's origin
+            self._translate(-left, -top)
+            self._layerEnabled = False
+            try:
+                self.Draw(self._layer)
+            finally:
+                self._layerEnabled = True
+                self._translate(left, top)
+            self._layerValid = True
+        self._layer.set_alpha(self.Alpha if self.Alpha < 255 else None)
+        surface.blit(self._layer, (left, top))
+
+    def _image_path(self, name):
+        return join(GraphicsPath, name)
+
+    # Images come from the shared asset cache. The caller must release the
+    # path with GetAssetCache().Release when done with the image.
     def _load_image(self, name):
-        global GraphicsPath
-        return pygame.image.load(join(GraphicsPath, name))
+        return GetAssetCache().Acquire(self._image_path(name))
  
     def _offset(self, obj):
         """ Translate a point or rectangle from view coordinate to window coordinate"""
+        rect = self.Rect
         if len(obj) == 2:
             # Offset a pos 2-tuple
-            return (obj[0] + self.Rect.left, obj[1] + self.Rect.top)
+            return (obj[0] + rect.left, obj[1] + rect.top)
         elif len(obj) == 4:
             # Offset a rect 4-tuple
-            return (obj[0] + self.Rect.left, obj[1] + self.Rect.top, obj[2], obj[3])
+            return (obj[0] + rect.left, obj[1] + rect.top, obj[2], obj[3])
     
+    def SetDisplayListEnabled(self, enabled):
+        """ Records what OnDraw draws through the drawing helpers of View and
+        replays the recording on later frames, until the view is invalidated.
+        When the view only moves the recording is translated instead. Only use
+        it for views that draw everything through the helpers. """
+        self._displayListEnabled = enabled
+        self.Invalidate()
+
+    # Do not override
+    def _draw_display_list(self, surface):
+        commands = self._displayList
+        if commands is None:
+            self._recording = []
+            try:
+                self.OnDraw(surface)
+            finally:
+                self._displayList = self._recording
+                self._displayListOrigin = self.Rect.topleft
+                self._recording = None
+            return
+
+        left, top = self.Rect.topleft
+        dx = left - self._displayListOrigin[0]
+        dy = top - self._displayListOrigin[1]
+        if dx or dy:
+            commands = [_translate_command(command, dx, dy) for command in commands]
+            self._displayList = commands
+            self._displayListOrigin = (left, top)
+        for command in commands:
+            kind = command[0]
+            if kind == _BLIT:
+                surface.blit(command[1], command[2])
+            elif kind == _RECT:
+                _draw_rect(surface, command[1], command[2], command[3])
+            elif kind == _LINE:
+                _draw_line(surface, command[1], command[2], command[3], command[4])
+            else:
+                command[1].Draw(surface, command[2], command[3])
+
+    # The drawing primitives below take window coordinates and are recorded
+    # when the view has a display list.
+    def _line(self, surface, color, start, end, width):
+        _draw_line(surface, color, start, end, width)
+        if self._recording is not None:
+            self._recording.append((_LINE, color, tuple(start), tuple(end), width))
+
+    def _rect(self, surface, color, rect, width):
+        _draw_rect(surface, color, rect, width)
+        if self._recording is not None:
+            self._recording.append((_RECT, color, tuple(rect), width))
+
+    def _blit(self, surface, source, pos):
+        surface.blit(source, pos)
+        if self._recording is not None:
+            self._recording.append((_BLIT, source, tuple(pos)))
+
+    def _glyphs(self, surface, glyphs, pos, text):
+        glyphs.Draw(surface, pos, text)
+        if self._recording is not None:
+            self._recording.append((_GLYPHS, glyphs, tuple(pos), text))
+
     def DrawLine(self, surface, color, start_pos, end_pos, width=1):
         """ Draws a line. Coordinates are relative to the top left corner of the view. """
-        pygame.draw.line(surface, color, self._offset(start_pos), self._offset(end_pos), width)
+        self._line(surface, color, self._offset(start_pos), self._offset(end_pos), width)
 
     def DrawRect(self, surface, color, rect, width=0):
         """ Draws a rectangle. Coordinates are relative to the top left corner of the view. """
-        pygame.draw.rect(surface, color, self._offset(rect), width)
+        self._rect(surface, color, self._offset(rect), width)
 
     def FillSelf(self, surface, color):
         """ Fills the view with a color."""
-        pygame.draw.rect(surface, color, self.Rect)
+        self._rect(surface, color, self.Rect, 0)
 
     def DrawText(self, surface, pos, text,
                  size=12,
@@ -204,16 +566,24 @@ class View:
                  bold=False,
                  italic=False,
                  antialias=True, 
-                 align=0):
-        font = GetFont(name, size, bold, italic)
-
-        msgSurface = font.render(text, antialias, color)
+                 align=0,
+                 atlas=False):
+        """ Draws text. With atlas=True the text is composed from cached glyphs
+        instead of being rendered, which suits text that changes often. """
+        if atlas:
+            glyphs = GetGlyphAtlas(name, size, bold, italic, color, antialias)
+            x, y = self._offset(pos)
+            if align == 1:
+                x -= glyphs.Size(text)[0] // 2
+            self._glyphs(surface, glyphs, (x, y), text)
+            return
+        msgSurface = RenderText(text, name, size, bold, italic, color, antialias)
         msgRect = msgSurface.get_rect()
         if align == 0:
             msgRect.topleft = self._offset(pos)
         elif align == 1:
             msgRect.midtop = self._offset(pos)
-        surface.blit(msgSurface, msgRect)
+        self._blit(surface, msgSurface, msgRect.topleft)
 
     def CenterText(self, surface, pos, text, size=12, name='sans',
                    color=(0, 0, 0),
@@ -227,11 +597,14 @@ class View:
                       text, size, name, color, bold, italic, antialias)
 
     def SetActive(self, state):
-        self.Active = state
+        if self.Active != state:
+            self.Active = state
+            self.Invalidate()
 
     def SetMargin(self, margin):
         self.Margin = margin
-        
+        self.RequestLayout()
+
     def SetBorderWidth(self, *args):
         if len(args) == 1:            
             self.BorderWidthTop = args[0]
@@ -248,9 +621,11 @@ class View:
             self.BorderWidthLeft = args[1]
             self.BorderWidthBottom = args[2]
             self.BorderWidthRight = args[3]
-        
+        self.Invalidate()
+
     def SetPadding(self, padding):
         self.Padding = padding
+        self.RequestLayout()
         
     def SetParent(self, parent:View):
         self.Parent = parent
@@ -269,34 +644,57 @@ class View:
             self.MinDimension = Dimension(width, height)
         else:
             self.MinDimension = None
+        self.RequestLayout()
 
     def SetPosition(self, *args):
-        if len(args) == 1 and isinstance(args[0], Point):
-            self.Rect.x = args[0].X
-            self.Rect.y = args[0].Y
+        if len(args) == 2:
+            x, y = args
+        elif len(args) == 1 and isinstance(args[0], Point):
+            x = args[0].X
+            y = args[0].Y
         else:
             point = Point(*args)
-            self.Rect.x = point.X
-            self.Rect.y = point.Y
+            x = point.X
+            y = point.Y
+        self._invalidate_region()
+        self.Rect.x = x
+        self.Rect.y = y
+        self._invalidate_region()
+        self._rect_changed()
 
     def SetSize(self, width, height):
+        self._invalidate_region()
         self.Rect.size = (width, height)
+        self.Invalidate()
+        self._rect_changed()
+
+    # Do not override. Called when Rect has been moved or resized.
+    def _rect_changed(self):
+        if self.Parent is not None:
+            self.Parent._child_rect_changed(self)
 
     def GetPosition(self) -> Point:
         return Point(self.Rect.x, self.Rect.y)
 
     def SetBackgroundColor(self, color):
         self.BackgroundColor = color
+        self.Invalidate()
 
     def IsPointInside(self, *args):
-        point = Point(*args)
-        return self.Rect.collidepoint(point.X, point.Y)
+        if len(args) == 2:
+            return self.Rect.collidepoint(args[0], args[1])
+        point = args[0]
+        if isinstance(point, Point):
+            return self.Rect.collidepoint(point.X, point.Y)
+        return self.Rect.collidepoint(point[0], point[1])
 
     def Intersection(self, other) -> pygame.Rect:
         return self.Rect.clip(other.Rect)
 
     def SetMeasuredDimension(self, width, height):
-        self.MeasuredDimension.set(width, height)
+        dim = self.MeasuredDimension
+        dim._width = width
+        dim._height = height
         
     def GetMeasuredDimension(self):
         return self.MeasuredDimension
@@ -306,23 +704,76 @@ class View:
         if self.MinDimension:
             self.MeasuredDimension.at_least(self.MinDimension)
 
+    # Do not override
+    def _profiler(self) -> FrameProfiler:
+        # Views can be used without a context
+        return self.Context.Profiler if self.Context is not None else None
+
+    # Do not override
+    def _is_measure_cached(self, widthMeasureSpec, heightMeasureSpec):
+        specs = (widthMeasureSpec, heightMeasureSpec)
+        if not self._layoutDirty and specs == self._measureSpecs:
+            return True
+        self._measureSpecs = specs
+        return False
+
     # Do not override. Override OnMeasure of specific View subclass instead.
     def Measure(self, widthMeasureSpec, heightMeasureSpec):
-        self.OnMeasure(widthMeasureSpec, heightMeasureSpec)
+        if self._is_measure_cached(widthMeasureSpec, heightMeasureSpec):
+            return
+        profiler = self._profiler()
+        if profiler is None:
+            self.OnMeasure(widthMeasureSpec, heightMeasureSpec)
+        else:
+            start = profiler.BeginView()
+            self.OnMeasure(widthMeasureSpec, heightMeasureSpec)
+            profiler.EndView('measure', self, start)
         self.MeasuredDimension.widen(self.Padding * 2)
         self.MeasuredDimension.heigten(self.Padding * 2)
         self._apply_min_dimension_measure()
                     
     # Do not override. Override OnLayout of specific View subclass instead.
     def Layout(self, left, top, width, height):
-        self.OnLayout(True, left, top, width, height)
+        args = (left, top, width, height)
+        if not self._layoutDirty and args == self._layoutArgs:
+            return
+        old = pygame.Rect(self.Rect)
+        profiler = self._profiler()
+        if profiler is None:
+            self.OnLayout(True, left, top, width, height)
+        else:
+            start = profiler.BeginView()
+            self.OnLayout(True, left, top, width, height)
+            profiler.EndView('layout', self, start)
+        self._layoutArgs = args
+        self._layoutDirty = False
+        if self.Rect != old:
+            self._rect_changed()
+            # The old area goes through the layers above, a ScrollView
+            # keeps the old pixels on its backing surface otherwise
+            self._invalidate_above(old)
+            if self.Rect.size != old.size:
+                self.Invalidate()
+            else:
+                self._invalidate_region()
 
     # Do not override. Override OnDraw of specific View subclass instead.
     def Draw(self, surface):
+        if self._layerEnabled:
+            if self.Visible:
+                self._draw_layer(surface)
+            return
         if self.Visible:
             #pygame.draw.rect(surface, self.BackgroundColor, self.Rect, 0)
             
-            self.OnDraw(surface)
+            draw = self._draw_display_list if self._displayListEnabled else self.OnDraw
+            profiler = self._profiler()
+            if profiler is None:
+                draw(surface)
+            else:
+                start = profiler.BeginView()
+                draw(surface)
+                profiler.EndView('draw', self, start)
             #if self.BorderWidthTop:
                 
             #pygame.draw.rect(surface, (255, 0, 0), self.Rect, 1)
@@ -354,22 +805,120 @@ class View:
     def OnMouseMove(self, x, y):
         pass
 
+    # Returns the state of the view that is kept in activity snapshots, as
+    # JSON compatible values, or None. Can be overridden by subclass.
+    def OnSaveState(self):
+        return None
+
+    # Called with the value returned by OnSaveState when an activity is
+    # restored from a snapshot. Can be overridden by subclass.
+    def OnRestoreState(self, state):
+        pass
+
+    # Do not override. Children that are part of the snapshot of the view tree.
+    def _snapshot_children(self):
+        return ()
+
+    # Called when the mouse is dragged with the button pressed on the view, or on
+    # one of its children, and the view is not movable. Return True if the
+    # motion was used, otherwise it is offered to the parent.
+    def OnMouseDrag(self, dx, dy) -> bool:
+        return False
+
+    # Called for mouse wheel events over the view. Return True if the event was
+    # handled, otherwise it is passed on to the parent.
+    def OnMouseWheel(self, x, y) -> bool:
+        return False
+
     def FindView(self, x, y):
         return self
 
 class ViewGroup(View):
+    __slots__ = ('Children', 'ClipChildren', '_spatialIndex', '_zOrder', '_nextZ', '_bounds')
+
     def __init__(self, context):
         super().__init__(context)
         self.Children:list[View] = []
+        self.ClipChildren = False
+        self._spatialIndex:SpatialGrid = None
+        self._zOrder = {}
+        self._nextZ = 0
+        self._bounds:pygame.Rect = None
 
     def __len__(self):
         return len(self.Children)
 
+    def SetSpatialIndex(self, enabled, cellSize=64):
+        """ Keeps the children in a spatial grid so that FindView does not have
+        to test every child. Useful for groups with many children, like an
+        AbsoluteLayout with lots of draggable items. """
+        if not enabled:
+            self._spatialIndex = None
+            self._zOrder = {}
+            return
+        self._spatialIndex = SpatialGrid(cellSize)
+        self._zOrder = {}
+        for child in self.Children:
+            self._index_child(child)
+
+    def _index_child(self, child):
+        # Z-order follows the order of Children, later children are on top
+        self._zOrder[child] = self._nextZ
+        self._nextZ += 1
+        self._spatialIndex.Update(child, child.Rect)
+
+    def _child_rect_changed(self, child):
+        if self._spatialIndex is not None and child in self._zOrder:
+            self._spatialIndex.Update(child, child.Rect)
+        self._bounds_changed()
+
+    def _rect_changed(self):
+        self._bounds_changed()
+        super()._rect_changed()
+
+    # Do not override. Drops the cached bounds of this group and its parents. A
+    # group only has cached bounds if all groups below it have them, so the
+    # walk can stop at the first group without.
+    def _bounds_changed(self):
+        group = self
+        while group is not None and group._bounds is not None:
+            group._bounds = None
+            group = group.Parent
+
+    def SetClipChildren(self, enabled):
+        """ Clips the drawing of the children to the rectangle of the group, so
+        children that overflow the group do not draw outside of it. """
+        self.ClipChildren = enabled
+        self._bounds = None
+        if self.Parent is not None:
+            self.Parent._bounds_changed()
+        self.Invalidate()
+
+    def GetBounds(self) -> pygame.Rect:
+        """ Returns the rectangle covering the group and everything its
+        children draw. The result is cached until a view below moves. """
+        if self.ClipChildren or self._layerEnabled:
+            return self.Rect
+        if self._bounds is None:
+            bounds = pygame.Rect(self.Rect)
+            children = [child.GetBounds() for child in self.Children]
+            if children:
+                bounds.union_ip(bounds.unionall(children))
+            self._bounds = bounds
+        return self._bounds
+
     def AddChild(self, child:View) -> View:
         child.SetParent(self)
         self.Children.append(child)
+        if self._spatialIndex is not None:
+            self._index_child(child)
+        self._bounds_changed()
+        self.RequestLayout()
         return child
 
+    def _snapshot_children(self):
+        return self.Children
+
     def GetChild(self, index) -> View:
         if index >= 0 and index < len(self.Children):
             return self.Children[index]
@@ -377,10 +926,25 @@ class ViewGroup(View):
 
     def Clear(self):
         self.Children = []
+        if self._spatialIndex is not None:
+            self._spatialIndex.Clear()
+            self._zOrder = {}
+        self._bounds_changed()
+        self.Invalidate()
+        self.RequestLayout()
 
     def FindView(self, x, y) -> View:
+        if self._spatialIndex is not None:
+            zOrder = self._zOrder
+            found = None
+            for child in self._spatialIndex.Query(x, y):
+                if child.Rect.collidepoint(x, y) and \
+                    (found is None or zOrder[child] > zOrder[found]):
+                    found = child
+            return found.FindView(x, y) if found is not None else None
+
         for child in reversed(self.Children):
-            if child.IsPointInside(x, y):
+            if child.Rect.collidepoint(x, y):
                 return child.FindView(x, y)
         return None
 
@@ -391,27 +955,69 @@ class ViewGroup(View):
             self.Children.append(x)
         except (ValueError, IndexError):
             return
+        if self._spatialIndex is not None:
+            self._zOrder.pop(x)
+            self._index_child(x)
+        x.Invalidate()
 
-    # Do not override
+    # Do not override. Children whose measure is still valid are skipped.
     def Measure(self, widthMeasureSpec, heightMeasureSpec):
+        if self._is_measure_cached(widthMeasureSpec, heightMeasureSpec):
+            return
         for child in self.Children:
             child.Measure(widthMeasureSpec, heightMeasureSpec)
-        self.OnMeasure(widthMeasureSpec, heightMeasureSpec)
+        profiler = self._profiler()
+        if profiler is None:
+            self.OnMeasure(widthMeasureSpec, heightMeasureSpec)
+        else:
+            start = profiler.BeginView()
+            self.OnMeasure(widthMeasureSpec, heightMeasureSpec)
+            profiler.EndView('measure', self, start)
         self._apply_min_dimension_measure()
 
-    # Do not override
-    def Layout(self, left, top, width, height):
+    # Do not override. The children may extend outside the group, so the whole
+    # subtree is skipped only when its bounds are outside the rectangle.
+    def _intersects(self, rect) -> bool:
+        return self.GetBounds().colliderect(rect)
+
+    def _translate(self, dx, dy):
+        View._translate(self, dx, dy)
+        if self._bounds is not None:
+            self._bounds.move_ip(dx, dy)
         for child in self.Children:
-            child.Layout(left, top, width, height)
-        self.OnLayout(True, left, top, width, height)
+            child._translate(dx, dy)
+        if self._spatialIndex is not None:
+            for child in self.Children:
+                self._spatialIndex.Update(child, child.Rect)
 
     # Do not override
     def Draw(self, surface):
-        for child in self.Children:
-            child.Draw(surface)
+        if self._layerEnabled:
+            if self.Visible:
+                self._draw_layer(surface)
+            return
+        clip = surface.get_clip()
+        if not self.ClipChildren:
+            for child in self.Children:
+                if child._intersects(clip):
+                    child.Draw(surface)
+            return
+
+        inner = clip.clip(self.Rect)
+        if not inner:
+            return
+        surface.set_clip(inner)
+        try:
+            for child in self.Children:
+                if child._intersects(inner):
+                    child.Draw(surface)
+        finally:
+            surface.set_clip(clip)
 
     
 class LinearLayout(ViewGroup):
+    __slots__ = ('Orientation',)
+
     HORIZONTAL = 1
     VERTICAL = 2
     def __init__(self, context, orientation=VERTICAL):
@@ -424,6 +1030,7 @@ class LinearLayout(ViewGroup):
 
     def SetOrientation(self, orientation):
         self.Orientation = orientation
+        self.RequestLayout()
 
     def OnMeasure(self, widthMeasureSpec, heightMeasureSpec):
         """
@@ -455,54 +1062,555 @@ class LinearLayout(ViewGroup):
         for child in self.Children:
             if self.Orientation == LinearLayout.HORIZONTAL:                
                 w = child.GetMeasuredDimension().width
-                child.OnLayout(changed, left, top, w, height)
+                child.Layout(left, top, w, height)
                 left += w
             if self.Orientation == LinearLayout.VERTICAL:                
                 h = child.GetMeasuredDimension().height
-                child.OnLayout(changed, left, top, width, h)
+                child.Layout(left, top, width, h)
                 top += h
 
 
+class ListAdapter:
+    """ Supplies the rows of a ListView. Either pass the item count (or a
+    function returning it) and a bind function, or override GetCount,
+    CreateView and BindView in a subclass. """
+    def __init__(self, count=0, bind=None, create=None):
+        self._count = count
+        self._bind = bind
+        self._create = create
+
+    def GetCount(self) -> int:
+        if callable(self._count):
+            return self._count()
+        return self._count
+
+    def CreateView(self, context) -> View:
+        if self._create:
+            return self._create(context)
+        return TextView(context)
+
+    def BindView(self, view:View, position:int):
+        if self._bind:
+            self._bind(view, position)
+
+
+class ListView(ViewGroup):
+    """ Vertical list that only has views for the visible rows plus a few rows
+    of overscan. Rows scrolled out of view are recycled for the rows scrolled
+    into view, so the cost follows the size of the viewport and not the number
+    of items. All rows have the same height. """
+    __slots__ = ('Adapter', 'ItemHeight', 'ViewportHeight', 'Overscan',
+                 'ScrollY', '_rows', '_recycled')
+
+    def __init__(self, context, adapter:ListAdapter=None, itemHeight=20,
+                 height=200, overscan=2):
+        super().__init__(context)
+        self.Adapter = adapter if adapter is not None else ListAdapter()
+        self.ItemHeight = itemHeight
+        self.ViewportHeight = height
+        self.Overscan = overscan
+        self.ScrollY = 0
+        self.ClipChildren = True
+        self._rows:dict[int, View] = {}
+        self._recycled:list[View] = []
+
+    def SetAdapter(self, adapter:ListAdapter):
+        self.Adapter = adapter
+        self.NotifyDataSetChanged()
+
+    def NotifyDataSetChanged(self):
+        """ Rebinds all rows. Call it when the items of the adapter change. """
+        self._recycled.extend(self._rows.values())
+        self._rows = {}
+        self.Children = []
+        self.RequestLayout()
+        self.Invalidate()
+
+    def GetContentHeight(self) -> int:
+        return self.Adapter.GetCount() * self.ItemHeight
+
+    # The rows are recreated by the next layout
+    def _snapshot_children(self):
+        return ()
+
+    def OnSaveState(self):
+        return self.ScrollY
+
+    def OnRestoreState(self, state):
+        self.ScrollY = state
+        self.RequestLayout()
+
+    def _clamp_scroll(self, y) -> int:
+        return int(max(0, min(y, self.GetContentHeight() - self.Rect.height)))
+
+    def ScrollTo(self, y):
+        y = self._clamp_scroll(y)
+        if y != self.ScrollY:
+            self.ScrollY = y
+            self._update_rows()
+            self.Invalidate()
+
+    def ScrollBy(self, dy):
+        self.ScrollTo(self.ScrollY + dy)
+
+    def OnMouseWheel(self, x, y) -> bool:
+        self.ScrollBy(-y * self.ItemHeight * 3)
+        return True
+
+    def _visible_range(self):
+        count = self.Adapter.GetCount()
+        first = max(0, self.ScrollY // self.ItemHeight - self.Overscan)
+        last = min(count, (self.ScrollY + self.Rect.height) // self.ItemHeight
+                   + 1 + self.Overscan)
+        return first, last
+
+    def _update_rows(self):
+        first, last = self._visible_range()
+        for position in [p for p in self._rows if p < first or p >= last]:
+            self._recycled.append(self._rows.pop(position))
+
+        left = self.Rect.left
+        top = self.Rect.top - self.ScrollY
+        width = self.Rect.width
+        for position in range(first, last):
+            view = self._rows.get(position)
+            if view is None:
+                if self._recycled:
+                    view = self._recycled.pop()
+                else:
+                    view = self.Adapter.CreateView(self.Context)
+                    view.SetParent(self)
+                self.Adapter.BindView(view, position)
+                self._rows[position] = view
+            view.Measure(None, None)
+            view.Layout(left, top + position * self.ItemHeight, width, self.ItemHeight)
+        self.Children = [self._rows[p] for p in range(first, last)]
+
+    def OnMeasure(self, widthMeasureSpec, heightMeasureSpec):
+        width = 0
+        for child in self.Children:
+            width = max(width, child.GetMeasuredDimension().width)
+        self.SetMeasuredDimension(width, min(self.GetContentHeight(),
+                                             self.ViewportHeight))
+
+    def OnLayout(self, changed, left, top, width, height):
+        self.Rect.topleft = (left, top)
+        self.Rect.size = (width, height)
+        self.ScrollY = self._clamp_scroll(self.ScrollY)
+        self._update_rows()
+
+
+class ScrollView(ViewGroup):
+    """ Shows a part of a child that is larger than the view and scrolls it
+    with the mouse wheel or by dragging. The visible part is kept in a backing
+    surface. Scrolling shifts the pixels already in it and only the strip that
+    comes into view is drawn, and views that change inside only redraw their
+    own rect of the backing surface.
+
+    The content keeps the place it has when not scrolled, so scrolling does not
+    move any views. The scroll offset is applied when the content is drawn, hit
+    tested or invalidated. """
+    __slots__ = ('ScrollX', 'ScrollY', 'ViewportWidth', 'ViewportHeight', 'WheelStep',
+                 '_backingDirty')
+
+    def __init__(self, context, width=None, height=200):
+        super().__init__(context)
+        self.ScrollX = 0
+        self.ScrollY = 0
+        self.ViewportWidth = width
+        self.ViewportHeight = height
+        self.WheelStep = 40
+        self.ClipChildren = True
+        # The backing surface is the layer of the view
+        self._layerEnabled = True
+        self._backingDirty:list[pygame.Rect] = []
+
+    def GetContentView(self) -> View:
+        return self.Children[0] if self.Children else None
+
+    def _clamp_scroll(self, x, y):
+        content = self.GetContentView()
+        if content is None:
+            return 0, 0
+        x = max(0, min(x, content.Rect.width - self.Rect.width))
+        y = max(0, min(y, content.Rect.height - self.Rect.height))
+        return int(x), int(y)
+
+    def ScrollTo(self, x, y):
+        x, y = self._clamp_scroll(x, y)
+        dx = x - self.ScrollX
+        dy = y - self.ScrollY
+        if not dx and not dy:
+            return
+        self.ScrollX = x
+        self.ScrollY = y
+        self._scroll_backing(dx, dy)
+        # The viewport shows other pixels, but none of its content changed
+        self._invalidate_above(pygame.Rect(self.Rect))
+
+    def ScrollBy(self, dx, dy):
+        self.ScrollTo(self.ScrollX + dx, self.ScrollY + dy)
+
+    def OnMouseWheel(self, x, y) -> bool:
+        self.ScrollBy(-x * self.WheelStep, -y * self.WheelStep)
+        return True
+
+    def OnMouseDrag(self, dx, dy) -> bool:
+        self.ScrollBy(-dx, -dy)
+        return True
+
+    # The content is restored at its scrolled position
+    def OnSaveState(self):
+        return [self.ScrollX, self.ScrollY]
+
+    def OnRestoreState(self, state):
+        self.ScrollX, self.ScrollY = state
+
+    def _scroll_backing(self, dx, dy):
+        rect = self.Rect
+        if not self._layerValid or abs(dx) >= rect.width or abs(dy) >= rect.height:
+            self._layerValid = False
+            return
+        self._layer.scroll(-dx, -dy)
+        dirty = [r.move(-dx, -dy) for r in self._backingDirty]
+        # The strips scrolled into view
+        width, height = rect.size
+        if dy > 0:
+            dirty.append(pygame.Rect(0, height - dy, width, dy))
+        elif dy < 0:
+            dirty.append(pygame.Rect(0, 0, width, -dy))
+        if dx > 0:
+            dirty.append(pygame.Rect(width - dx, 0, dx, height))
+        elif dx < 0:
+            dirty.append(pygame.Rect(0, 0, -dx, height))
+        self._backingDirty = dirty
+
+    # The dirty regions are kept relative to the backing surface, so they stay
+    # right when the view is moved for drawing
+    def _layer_invalidated(self, rect):
+        rect = rect.clip(self.Rect)
+        if rect == self.Rect:
+            self._layerValid = False
+        elif rect:
+            self._backingDirty.append(rect.move(-self.Rect.left, -self.Rect.top))
+
+    def _child_invalidated(self, rect):
+        rect = rect.move(-self.ScrollX, -self.ScrollY).clip(self.Rect)
+        if not rect:
+            return None
+        self._layer_invalidated(rect)
+        return rect
+
+    def FindView(self, x, y) -> View:
+        content = self.GetContentView()
+        x += self.ScrollX
+        y += self.ScrollY
+        if content is not None and content.Rect.collidepoint(x, y):
+            return content.FindView(x, y)
+        return None
+
+    def SetLayerEnabled(self, enabled, transparent=False):
+        # A ScrollView is always drawn through its backing surface
+        pass
+
+    def OnMeasure(self, widthMeasureSpec, heightMeasureSpec):
+        content = self.GetContentView()
+        width = height = 0
+        if content is not None:
+            dim = content.GetMeasuredDimension()
+            width, height = dim.width, dim.height
+        if self.ViewportWidth is not None:
+            width = self.ViewportWidth
+        self.SetMeasuredDimension(width, min(height, self.ViewportHeight))
+
+    def OnLayout(self, changed, left, top, width, height):
+        self.Rect.topleft = (left, top)
+        self.Rect.size = (width, height)
+        content = self.GetContentView()
+        if content is None:
+            return
+        dim = content.GetMeasuredDimension()
+        content.Layout(left, top, max(dim.width, width), dim.height)
+        x, y = self._clamp_scroll(self.ScrollX, self.ScrollY)
+        if (x, y) != (self.ScrollX, self.ScrollY):
+            self.ScrollX = x
+            self.ScrollY = y
+            self._layerValid = False
+
+    def Draw(self, surface):
+        left, top = self.Rect.topleft
+        size = self.Rect.size
+        if not self.Visible or size[0] <= 0 or size[1] <= 0:
+            return
+        if self._layer is None or self._layer.get_size() != size:
+            self._layer = pygame.Surface(size)
+            self._layerValid = False
+        if self._layerValid:
+            regions = CoalesceRects(self._backingDirty, pygame.Rect((0, 0), size))
+        else:
+            regions = [pygame.Rect((0, 0), size)]
+        self._backingDirty = []
+        self._layerValid = True
+
+        if regions:
+            backing = self._layer
+            # Content coordinates to backing coordinates
+            dx = -left - self.ScrollX
+            dy = -top - self.ScrollY
+            try:
+                for clip in regions:
+                    backing.set_clip(clip)
+                    backing.fill(GRAY_50)
+                    region = clip.move(-dx, -dy)
+                    for child in self.Children:
+                        if child._intersects(region):
+                            _draw_moved(child, backing, dx, dy, clip, region)
+            finally:
+                backing.set_clip(None)
+        surface.blit(self._layer, (left, top))
+
+
+# Draws a view moved by (dx, dy). Groups drawn the ordinary way are walked
+# down, so that only the views inside clip are moved for drawing. region is
+# clip in the coordinates of the view.
+def _draw_moved(view, surface, dx, dy, clip, region):
+    if type(view).Draw is not ViewGroup.Draw or view._layerEnabled:
+        view._translate(dx, dy)
+        try:
+            view.Draw(surface)
+        finally:
+            view._translate(-dx, -dy)
+        return
+    if not view.ClipChildren:
+        for child in view.Children:
+            if child._intersects(region):
+                _draw_moved(child, surface, dx, dy, clip, region)
+        return
+    inner = clip.clip(view.Rect.move(dx, dy))
+    if not inner:
+        return
+    surface.set_clip(inner)
+    try:
+        region = inner.move(-dx, -dy)
+        for child in view.Children:
+            if child._intersects(region):
+                _draw_moved(child, surface, dx, dy, inner, region)
+    finally:
+        surface.set_clip(clip)
+
+
 class GridLayout(ViewGroup):
+    """ Grid where each row is as high as its highest child and each column as
+    wide as its widest child. AddChild puts a child in the next free cell in
+    row order, or in a given cell, and a child can span several rows and
+    columns. Cells can stay empty, and rows are added when children are placed
+    below the last one.
+
+    Row heights and column widths are kept between measure passes, and only
+    the rows and columns of children whose size changed are computed again.
+    The offsets of rows and columns are prefix sums, so placing a child costs
+    the same anywhere in the grid. """
+    __slots__ = ('Rows', 'Columns', '_initialRows', '_cells', '_occupied', '_nextCell', '_sizes',
+                 '_rowChildren', '_columnChildren', '_spanning', '_rowHeights',
+                 '_columnWidths', '_dirtyRows', '_dirtyColumns', '_rowOffsets',
+                 '_columnOffsets')
+
     def __init__(self, context, rows, columns):
         super().__init__(context)
         self.Rows = rows
         self.Columns = columns
+        # Rows are added when children are placed below the last one
+        self._initialRows = rows
+        self._reset()
+
+    def _reset(self):
+        self.Rows = self._initialRows
+        # Cell (row, column, row span, column span) of each child
+        self._cells:dict[View, tuple] = {}
+        self._occupied = set()
+        self._nextCell = 0
+        # Measured sizes seen by the last pass
+        self._sizes:dict[View, tuple] = {}
+        # Children spanning one row or column, by row and column, and the others
+        self._rowChildren = [[] for _ in range(self.Rows)]
+        self._columnChildren = [[] for _ in range(self.Columns)]
+        self._spanning = []
+        # Sizes from the children spanning one row or column
+        self._rowHeights = [0] * self.Rows
+        self._columnWidths = [0] * self.Columns
+        self._dirtyRows = set()
+        self._dirtyColumns = set()
+        self._rowOffsets = [0] * (self.Rows + 1)
+        self._columnOffsets = [0] * (self.Columns + 1)
+
+    def _add_rows(self, rows):
+        while self.Rows < rows:
+            self._rowChildren.append([])
+            self._rowHeights.append(0)
+            self.Rows += 1
+
+    def _is_free(self, row, column, rowSpan, columnSpan) -> bool:
+        occupied = self._occupied
+        return all((r, c) not in occupied
+                   for r in range(row, row + rowSpan)
+                   for c in range(column, column + columnSpan))
+
+    def _next_free_cell(self, rowSpan, columnSpan):
+        index = self._nextCell
+        while True:
+            row, column = divmod(index, self.Columns)
+            if column + columnSpan <= self.Columns and \
+                    self._is_free(row, column, rowSpan, columnSpan):
+                return row, column
+            index += 1
+
+    def AddChild(self, child:View, row=None, column=None, rowSpan=1, columnSpan=1) -> View:
+        """ Adds a child at the given cell, or in the next free cell when no
+        cell is given. """
+        if columnSpan < 1 or rowSpan < 1 or columnSpan > self.Columns:
+            raise ValueError(f'Invalid span {rowSpan}x{columnSpan} for {self!r}')
+        if row is None or column is None:
+            row, column = self._next_free_cell(rowSpan, columnSpan)
+            self._nextCell = row * self.Columns + column + columnSpan
+        elif row < 0 or column < 0 or column + columnSpan > self.Columns:
+            raise ValueError(f'Cell ({row}, {column}) is outside of {self!r}')
+        elif not self._is_free(row, column, rowSpan, columnSpan):
+            raise ValueError(f'Cell ({row}, {column}) of {self!r} is already occupied')
+        super().AddChild(child)
+        self._place(child, row, column, rowSpan, columnSpan)
+        return child
+
+    def SetCell(self, child:View, row, column, rowSpan=1, columnSpan=1):
+        """ Moves a child to another cell. """
+        if columnSpan < 1 or rowSpan < 1 or columnSpan > self.Columns:
+            raise ValueError(f'Invalid span {rowSpan}x{columnSpan} for {self!r}')
+        if row < 0 or column < 0 or column + columnSpan > self.Columns:
+            raise ValueError(f'Cell ({row}, {column}) is outside of {self!r}')
+        old = self._cells[child]
+        self._unplace(child)
+        if not self._is_free(row, column, rowSpan, columnSpan):
+            self._place(child, *old)
+            raise ValueError(f'Cell ({row}, {column}) of {self!r} is already occupied')
+        self._place(child, row, column, rowSpan, columnSpan)
+        self.RequestLayout()
+
+    def GetCell(self, child:View) -> tuple:
+        """ Returns (row, column, row span, column span) of a child. """
+        return self._cells[child]
+
+    def _place(self, child, row, column, rowSpan, columnSpan):
+        self._add_rows(row + rowSpan)
+        self._cells[child] = (row, column, rowSpan, columnSpan)
+        for r in range(row, row + rowSpan):
+            for c in range(column, column + columnSpan):
+                self._occupied.add((r, c))
+        if rowSpan == 1:
+            self._rowChildren[row].append(child)
+            self._dirtyRows.add(row)
+        if columnSpan == 1:
+            self._columnChildren[column].append(child)
+            self._dirtyColumns.add(column)
+        if rowSpan > 1 or columnSpan > 1:
+            self._spanning.append(child)
+        self._sizes.pop(child, None)
+
+    def _unplace(self, child):
+        row, column, rowSpan, columnSpan = self._cells.pop(child)
+        for r in range(row, row + rowSpan):
+            for c in range(column, column + columnSpan):
+                self._occupied.discard((r, c))
+        if rowSpan == 1:
+            self._rowChildren[row].remove(child)
+            self._dirtyRows.add(row)
+        if columnSpan == 1:
+            self._columnChildren[column].remove(child)
+            self._dirtyColumns.add(column)
+        if rowSpan > 1 or columnSpan > 1:
+            self._spanning.remove(child)
+        self._nextCell = min(self._nextCell, row * self.Columns + column)
+
+    def Clear(self):
+        super().Clear()
+        self._reset()
 
     def OnMeasure(self, withMeasureSpec, heightMeasureSpec):
-        self._max_row_heights = [0] * self.Rows
-        self._max_col_widths = [0] * self.Columns
-        for i, child in enumerate(self.Children):            
-            col = i % self.Columns
-            row = i // self.Columns
-            dim = child.GetMeasuredDimension()
-            if dim.width > self._max_col_widths[col]:
-                self._max_col_widths[col] = dim.width
-            if dim.height > self._max_row_heights[row]:
-                self._max_row_heights[row] = dim.height
-        width = sum(self._max_col_widths)
-        height = sum(self._max_row_heights)
-        self.SetMeasuredDimension(width, height)
+        sizes = self._sizes
+        cells = self._cells
+        dirtyRows = self._dirtyRows
+        dirtyColumns = self._dirtyColumns
+        for child in self.Children:
+            dim = child.MeasuredDimension
+            size = (dim.width, dim.height)
+            if sizes.get(child) != size:
+                sizes[child] = size
+                row, column, rowSpan, columnSpan = cells[child]
+                if rowSpan == 1:
+                    dirtyRows.add(row)
+                if columnSpan == 1:
+                    dirtyColumns.add(column)
+
+        for row in dirtyRows:
+            self._rowHeights[row] = max([sizes[child][1] for child in self._rowChildren[row]],
+                                        default=0)
+        for column in dirtyColumns:
+            self._columnWidths[column] = max([sizes[child][0]
+                                              for child in self._columnChildren[column]],
+                                             default=0)
+        dirtyRows.clear()
+        dirtyColumns.clear()
+
+        heights = self._rowHeights
+        widths = self._columnWidths
+        if self._spanning:
+            # Spanning children widen the rows and columns they span evenly
+            heights = list(heights)
+            widths = list(widths)
+            for child in self._spanning:
+                row, column, rowSpan, columnSpan = cells[child]
+                width, height = sizes[child]
+                _distribute(widths, column, columnSpan, width)
+                _distribute(heights, row, rowSpan, height)
+        self._rowOffsets = list(accumulate(heights, initial=0))
+        self._columnOffsets = list(accumulate(widths, initial=0))
+        self.SetMeasuredDimension(self._columnOffsets[-1], self._rowOffsets[-1])
 
     def OnLayout(self, changed, left, top, width, height):
         self.Rect.topleft = (left, top)
         self.Rect.size = (self.MeasuredDimension.width,
                           self.MeasuredDimension.height)
 
-        for i, child in enumerate(self.Children):
-            row = i // self.Columns
-            col = i % self.Columns
-            x = left + sum(self._max_col_widths[:col])
-            y = top + sum(self._max_row_heights[:row])
-            child.OnLayout(changed, x, y,
-                           self._max_col_widths[col],
-                           self._max_row_heights[row])
+        if len(self._sizes) != len(self.Children):
+            # Restored from a snapshot without measuring, see Activity.RestoreSnapshot
+            self.OnMeasure(None, None)
+        rows = self._rowOffsets
+        columns = self._columnOffsets
+        cells = self._cells
+        for child in self.Children:
+            row, column, rowSpan, columnSpan = cells[child]
+            x = columns[column]
+            y = rows[row]
+            child.Layout(left + x, top + y,
+                         columns[column + columnSpan] - x,
+                         rows[row + rowSpan] - y)
 
     def __repr__(self):
         return f'<GridLayout cols={self.Columns} rows={self.Rows}>'
 
 
+def _distribute(sizes, first, span, needed):
+    if span == 1:
+        return
+    missing = needed - sum(sizes[first:first + span])
+    if missing <= 0:
+        return
+    share, extra = divmod(missing, span)
+    for i in range(span):
+        sizes[first + i] += share + (1 if i < extra else 0)
+
+
 class AbsoluteLayout(ViewGroup):
+    __slots__ = ()
+
     def __init__(self, context: AppContext):
         super().__init__(context)
         self.Context = context
@@ -511,23 +1619,32 @@ class AbsoluteLayout(ViewGroup):
         width = 0
         height = 0
         for child in self.Children:
-            child.OnMeasure(widthMeasureSpec, heightMeasureSpec)
-            pos = child.GetPosition()
-            dim = child.GetMeasuredDimension()
-            if pos.X + dim.width > width:
-                width = pos.X + dim.width
-            if pos.Y + dim.height > height:
-                height = pos.Y + dim.height
+            right = child.Rect.x + child.MeasuredDimension._width
+            bottom = child.Rect.y + child.MeasuredDimension._height
+            if right > width:
+                width = right
+            if bottom > height:
+                height = bottom
         self.SetMeasuredDimension(width, height)
 
     def OnLayout(self, changed, left, top, width, height):
+        self.Rect.topleft = (left, top)
+        self.Rect.size = (width, height)
+        # Children keep the position they were given with SetPosition
         for child in self.Children:
-            child.OnLayout(changed, left, top, width, height)
+            dim = child.GetMeasuredDimension()
+            child.Layout(child.Rect.x, child.Rect.y, dim.width, dim.height)
 
 
 class TextView(View):
+    __slots__ = ('TextSize', 'TextColor', 'FontName', 'Bold', 'Italic', 'Gravity',
+                 'UseGlyphAtlas', 'MultiLine', 'WrapWidth', '_text', '_appended',
+                 '_rewrap', '_wrapped')
+
     def __init__(self, context, text=''):
         super().__init__(context)
+        self._appended = []
+        self._rewrap = True
         self.Text = text
         self.TextSize = 16
         self.TextColor = (0, 0, 0)
@@ -535,114 +1652,329 @@ class TextView(View):
         self.Bold = False
         self.Italic = False
         self.Gravity = 0
+        self.UseGlyphAtlas = False
+        self.MultiLine = False
+        self.WrapWidth = None
+        self._wrapped = None
+
+    @property
+    def Text(self):
+        # Appended text is joined on the first read
+        if self._appended:
+            self._appended.insert(0, self._text)
+            self._text = ''.join(self._appended)
+            self._appended.clear()
+        return self._text
+
+    @Text.setter
+    def Text(self, text):
+        self._text = text
+        self._appended.clear()
+        self._rewrap = True
 
     def SetTextSize(self, size):
         self.TextSize = size
+        self.Invalidate()
+        self.RequestLayout()
 
     def SetText(self, text):
         self.Text = text
+        self.Invalidate()
+        self.RequestLayout()
+
+    def AppendText(self, text):
+        """ Adds text at the end. The text is not copied, and a multi-line
+        view only breaks the last paragraph and the new ones into lines again. """
+        if not text:
+            return
+        self._appended.append(text)
+        if self._wrapped is not None and not self._rewrap:
+            self._wrapped.Append(text)
+        self.Invalidate()
+        self.RequestLayout()
+
+    def SetMultiLine(self, enabled, wrapWidth=None):
+        """ Draws the text on several lines. Lines end at newlines and are
+        wrapped to the width given by the measure spec, or to wrapWidth when
+        the spec has no size. The layouts measure their children without a
+        spec, so inside them the text is only wrapped with a wrapWidth. """
+        self.MultiLine = enabled
+        self.WrapWidth = wrapWidth
+        self._wrapped = WrappedText() if enabled else None
+        self._rewrap = True
+        self.Invalidate()
+        self.RequestLayout()
+
+    def SetGlyphAtlas(self, enabled):
+        """ Draws the text from cached glyphs instead of rendering the whole
+        string. Use it for text that changes often, like counters and clocks. """
+        self.UseGlyphAtlas = enabled
+        self.Invalidate()
+        # The atlas and font.render measure text a little differently
+        self.RequestLayout()
+
+    def OnSaveState(self):
+        return self.Text
+
+    def OnRestoreState(self, state):
+        self.Text = state
+        if self.MultiLine:
+            # The lines are broken while measuring
+            self.RequestLayout()
+
+    def _measure_lines(self, widthMeasureSpec):
+        width = self.WrapWidth
+        if widthMeasureSpec is not None and widthMeasureSpec.Mode != MeasureSpec.UNSPECIFIED:
+            width = widthMeasureSpec.Size
+        wrapped = self._wrapped
+        if self._rewrap or not wrapped.Matches(width, self.FontName, self.TextSize,
+                                               self.Bold, self.Italic):
+            wrapped.Update(self.Text, width, self.FontName, self.TextSize, self.Bold, self.Italic)
+            self._rewrap = False
+        height = len(wrapped) * GetGlyphMetrics(self.FontName, self.TextSize,
+                                                self.Bold, self.Italic).Height
+        if width is None or (widthMeasureSpec is not None
+                             and widthMeasureSpec.Mode == MeasureSpec.AT_MOST):
+            width = wrapped.MaxWidth
+        self.SetMeasuredDimension(width, height)
 
     def OnMeasure(self, widthMeasureSpec, heightMeasureSpec):
-        font = GetFont(self.FontName, self.TextSize,
-                                   self.Bold, self.Italic)
-        width, height = font.size(self.Text)
+        if self.MultiLine:
+            self._measure_lines(widthMeasureSpec)
+            return
+        if self.UseGlyphAtlas:
+            width, height = MeasureText(self.Text, self.FontName, self.TextSize,
+                                        self.Bold, self.Italic)
+        else:
+            # font.render can be wider than the summed glyph advances. The
+            # surface is cached and is the one OnDraw blits.
+            width, height = RenderText(self.Text, self.FontName, self.TextSize,
+                                       self.Bold, self.Italic, self.TextColor).get_size()
         self.SetMeasuredDimension(width, height)
 
     def SetGravity(self, gravity):
         self.Gravity = gravity
+        self.Invalidate()
+
+    def _draw_lines(self, surface):
+        lines = self._wrapped.Lines
+        lineHeight = GetGlyphMetrics(self.FontName, self.TextSize, self.Bold, self.Italic).Height
+        first = 0
+        last = len(lines)
+        if self._recording is None:
+            # Only the lines inside the clip rectangle are drawn
+            clip = surface.get_clip()
+            first = max(0, (clip.top - self.Rect.top) // lineHeight)
+            last = min(last, (clip.bottom - self.Rect.top) // lineHeight + 1)
+        if self.UseGlyphAtlas:
+            glyphs = GetGlyphAtlas(self.FontName, self.TextSize, self.Bold,
+                                   self.Italic, self.TextColor)
+        for i in range(first, last):
+            line = lines[i]
+            y = self.Rect.top + i * lineHeight
+            if self.UseGlyphAtlas:
+                x = self.Rect.left
+                if self.Gravity & CENTER_HORIZONTAL:
+                    x += self.Rect.width // 2 - glyphs.Size(line)[0] // 2
+                self._glyphs(surface, glyphs, (x, y), line)
+                continue
+            msgSurface = RenderText(line, self.FontName, self.TextSize,
+                                    self.Bold, self.Italic, self.TextColor)
+            x = self.Rect.left
+            if self.Gravity & CENTER_HORIZONTAL:
+                x += self.Rect.width // 2 - msgSurface.get_width() // 2
+            self._blit(surface, msgSurface, (x, y))
 
     def OnDraw(self, surface):
-        font = GetFont(self.FontName, self.TextSize,
-                       self.Bold, self.Italic)
-        msgSurface = font.render(self.Text, True, self.TextColor)
+        if self.MultiLine:
+            self._draw_lines(surface)
+            return
+        if self.UseGlyphAtlas:
+            glyphs = GetGlyphAtlas(self.FontName, self.TextSize, self.Bold,
+                                   self.Italic, self.TextColor)
+            x = self.Rect.left
+            if self.Gravity & CENTER_HORIZONTAL:
+                x += self.Rect.width // 2 - glyphs.Size(self.Text)[0] // 2
+            self._glyphs(surface, glyphs, (x, self.Rect.top), self.Text)
+            return
+        msgSurface = RenderText(self.Text, self.FontName, self.TextSize,
+                                self.Bold, self.Italic, self.TextColor)
         msgRect = msgSurface.get_rect()
         if self.Gravity == 0:
             msgRect.topleft = self.Rect.topleft
         if self.Gravity & CENTER_HORIZONTAL:
             msgRect.left = self.Rect.left + self.Rect.width / 2 - msgRect.width / 2
-        surface.blit(msgSurface, msgRect)
+        self._blit(surface, msgSurface, msgRect.topleft)
 
 
 class TextInputView(TextView):
+    """ Single line text input. The text is kept in a gap buffer so edits at the
+    cursor do not copy the whole text, and the view scrolls horizontally to keep
+    the cursor visible. Only the characters in the visible window are drawn. """
+    __slots__ = ('Cursor', 'Insert', 'Password', 'ScrollChar', '_buffer', '_visible')
+
     def __init__(self, context):
+        self._buffer = GapBuffer()
+        self._visible = None
         super().__init__(context)
         self.Cursor = len(self.Text)
+        self.ScrollChar = 0
         self.Insert = True
         self.Password = False
         self.Focusable = True
+        self.UseGlyphAtlas = True
         self.SetMinDimension(100, 10)
 
-    def OnDraw(self, surface):
-        pygame.draw.rect(surface, (255, 255, 255), self.Rect, 0)
+    @property
+    def Text(self):
+        return self._buffer.GetText()
+
+    @Text.setter
+    def Text(self, text):
+        self._buffer.SetText(text)
+
+    def AppendText(self, text):
+        self._buffer.Insert(len(self._buffer), text)
+        self.Invalidate()
+        self.RequestLayout()
+
+    def _metrics(self):
+        return GetGlyphMetrics(self.FontName, self.TextSize, self.Bold, self.Italic)
+
+    def _char(self, index):
+        return '*' if self.Password else self._buffer.CharAt(index)
+
+    def _scroll_to_cursor(self):
+        """ Moves the visible window so the cursor is inside it. Only the
+        characters between the window start and the cursor are looked at. """
+        if self.Cursor <= self.ScrollChar:
+            self.ScrollChar = self.Cursor
+            return
+        if self.Rect.width <= 0:
+            # Not laid out yet, OnLayout scrolls
+            return
+        metrics = self._metrics()
+        available = self.Rect.width - metrics.Advance('|')
+        x = 0
+        index = self.Cursor
+        while index > self.ScrollChar:
+            x += metrics.Advance(self._char(index - 1))
+            if x > available:
+                self.ScrollChar = index
+                return
+            index -= 1
+
+    def _visible_text(self) -> str:
+        """ Returns the characters that fit in the view from ScrollChar on. The
+        result is kept until the text, the window or the size changes. """
+        key = (self._buffer.Version, self.ScrollChar, self.Rect.width, self.Password,
+               self.FontName, self.TextSize, self.Bold, self.Italic)
+        if self._visible is not None and self._visible[0] == key:
+            return self._visible[1]
+        metrics = self._metrics()
+        length = len(self._buffer)
+        end = self.ScrollChar
+        x = 0
+        while end < length and x < self.Rect.width:
+            x += metrics.Advance(self._char(end))
+            end += 1
         if self.Password:
-            text = '*' * len(self.Text)
+            text = '*' * (end - self.ScrollChar)
         else:
-            text = self.Text
+            text = self._buffer.Slice(self.ScrollChar, end)
+        self._visible = (key, text)
+        return text
+
+    def OnMeasure(self, widthMeasureSpec, heightMeasureSpec):
+        # The view scrolls, so its size does not depend on the text
+        self.SetMeasuredDimension(0, self._metrics().Height)
+
+    def OnLayout(self, changed, left, top, width, height):
+        super().OnLayout(changed, left, top, width, height)
+        # Show as much of the text before the cursor as fits the new width
+        self.ScrollChar = 0
+        self._scroll_to_cursor()
 
-        self.DrawText(surface, self.Rect.topleft, text=text,
+    def OnDraw(self, surface):
+        self.FillSelf(surface, (255, 255, 255))
+        text = self._visible_text()
+        self.DrawText(surface, (0, 0), text=text,
                       size=self.TextSize,
-                      color=self.TextColor)
+                      name=self.FontName,
+                      color=self.TextColor,
+                      bold=self.Bold,
+                      italic=self.Italic,
+                      atlas=self.UseGlyphAtlas)
 
         if self.Focus:
-            if self.Insert:
-                self.DrawText(surface, self.Rect.topleft, text[0:self.Cursor] + '|',
-                              size=self.TextSize,
-                              color=self.TextColor)
-            else:
-                if self.Cursor > 0:
-                    c = text[0:self.Cursor] + '_'
-                else:
-                    c = '_'
-                self.DrawText(surface, self.Rect.topleft, c, self.TextSize,
-                              color=self.TextColor)
+            # The caret goes after the characters before the cursor
+            offsets = self._metrics().Offsets(text[:self.Cursor - self.ScrollChar])
+            self.DrawText(surface, (offsets[-1], 0), '|' if self.Insert else '_',
+                          size=self.TextSize,
+                          name=self.FontName,
+                          color=self.TextColor,
+                          bold=self.Bold,
+                          italic=self.Italic,
+                          atlas=self.UseGlyphAtlas)
 
     def SetText(self, text):
-        self.Text = text
+        self._buffer.SetText(text)
         self.Cursor = len(text)
+        self._scroll_to_cursor()
+        self.Invalidate()
+
+    def OnSaveState(self):
+        return [self.Text, self.Cursor, self.ScrollChar, self.Insert]
+
+    def OnRestoreState(self, state):
+        text, self.Cursor, self.ScrollChar, self.Insert = state
+        self._buffer.SetText(text)
+
+    def InsertText(self, text):
+        """ Inserts text at the cursor, e.g. pasted text. """
+        self._buffer.Insert(self.Cursor, text)
+        self.Cursor += len(text)
+        self._scroll_to_cursor()
+        self.Invalidate()
 
     def OnEvent(self, event):
-        if event.type == pygame.KEYDOWN:
-            key = event.key
-            if key == pygame.K_BACKSPACE:
-                if len(self.Text) > 0:
-                    self.Text = self.Text[0:len(self.Text) - 1]
-                    self.Cursor -= 1
-            elif key == pygame.K_INSERT:
-                self.Insert = not self.Insert
-            elif key == pygame.K_LEFT:
-                if self.Cursor > 0:
-                    self.Cursor -= 1
-            elif key == pygame.K_RIGHT:
-                if self.Cursor < len(self.Text):
-                    self.Cursor += 1
-            elif key == pygame.K_HOME:
-                self.Cursor = 0
-            elif key == pygame.K_END:
-                self.Cursor = len(self.Text)
-            elif key == pygame.K_DELETE:
-                if self.Cursor == 0:
-                    self.Text = self.Text[1:]
-                else:
-                    self.Text = self.Text[0:self.Cursor] + \
-                        self.Text[self.Cursor + 1:]
-            elif chr(key).isalnum():
-                if self.Insert:
-                    if self.Cursor == 0:
-                        self.Text = chr(key) + self.Text
-                    else:
-                        self.Text = self.Text[0:self.Cursor] + \
-                            chr(key) + self.Text[self.Cursor:]
-                    self.Cursor += 1
-                else:
-                    if self.Cursor == 0:
-                        self.Text = chr(key) + self.Text[1:]
-                    else:
-                        self.Text = self.Text[0:self.Cursor] + \
-                            chr(key) + self.Text[self.Cursor + 1:]
-                    self.Cursor += 1
+        if event.type != pygame.KEYDOWN:
+            return
+        buffer = self._buffer
+        key = event.key
+        if key == pygame.K_BACKSPACE:
+            if self.Cursor > 0:
+                self.Cursor -= 1
+                buffer.Delete(self.Cursor)
+        elif key == pygame.K_INSERT:
+            self.Insert = not self.Insert
+        elif key == pygame.K_LEFT:
+            if self.Cursor > 0:
+                self.Cursor -= 1
+        elif key == pygame.K_RIGHT:
+            if self.Cursor < len(buffer):
+                self.Cursor += 1
+        elif key == pygame.K_HOME:
+            self.Cursor = 0
+        elif key == pygame.K_END:
+            self.Cursor = len(buffer)
+        elif key == pygame.K_DELETE:
+            buffer.Delete(self.Cursor)
+        elif key < 0x110000 and chr(key).isalnum():
+            if self.Insert:
+                buffer.Insert(self.Cursor, chr(key))
+            else:
+                buffer.Replace(self.Cursor, chr(key))
+            self.Cursor += 1
+        else:
+            return
+        self._scroll_to_cursor()
+        self.Invalidate()
 
 
 class ButtonView(TextView):
+    __slots__ = ('Pressed',)
+
     def __init__(self, context, text=''):
         super().__init__(context, text)
         self.Pressed = False
@@ -650,18 +1982,20 @@ class ButtonView(TextView):
         self.Padding = 12
 
     def SetPressed(self, isPressed):
-        self.Pressed = isPressed
+        if self.Pressed != isPressed:
+            self.Pressed = isPressed
+            self.Invalidate()
 
     def IsPressed(self):
         return self.Pressed
 
     def OnEvent(self, event):
         if event.type == pygame.MOUSEBUTTONUP:
-            self.Pressed = False
+            self.SetPressed(False)
         if not self.Active:
             return
         if event.type == pygame.MOUSEBUTTONDOWN:
-            self.Pressed = True
+            self.SetPressed(True)
 
     #def OnMeasure(self, widthMeasureSpec, heightMeasureSpec):
     #    self.SetMeasuredDimension(self._width, self._height)
@@ -672,10 +2006,10 @@ class ButtonView(TextView):
         inactive = (144, 144, 144)
         
         if self.IsPressed():
-            pygame.draw.rect(surface, pressed, self.Rect, 0)
+            self.FillSelf(surface, pressed)
             color = normal
         else:
-            pygame.draw.rect(surface, normal, self.Rect, 0)
+            self.FillSelf(surface, normal)
             color = pressed
 
         if not self.Active:
@@ -690,15 +2024,59 @@ class ButtonView(TextView):
 
 
 class ImageView(View):
-    def __init__(self, context, filename=None):
+    __slots__ = ('Image', '_imagePath', '_imageRelease')
+
+    def __init__(self, context, filename=None, asynchronous=False):
         super().__init__(context)
         self.Image = None
+        self._imagePath = None
+        self._imageRelease = None
         if filename:
-            self.LoadImage(filename)
+            if asynchronous:
+                self.LoadImageAsync(filename)
+            else:
+                self.LoadImage(filename)
+
+    def _set_image(self, path, image):
+        if self._imageRelease is not None:
+            self._imageRelease()
+            self._imageRelease = None
+        self.Image = image
+        if image is not None:
+            # The cached image is released when the view is garbage collected
+            self._imageRelease = weakref.finalize(self, GetAssetCache().Release, path)
+        self.Invalidate()
+        self.RequestLayout()
 
     def LoadImage(self, filename):
         if filename.rsplit('.', 1)[-1].lower() == 'png':
-            self.Image = self._load_image(filename)
+            self._imagePath = self._image_path(filename)
+            self._set_image(self._imagePath, self._load_image(filename))
+
+    def LoadImageAsync(self, filename):
+        """ Decodes the image in the background. The view shows the image, and
+        is measured again, once it has been loaded. """
+        if filename.rsplit('.', 1)[-1].lower() != 'png':
+            return
+        path = self._image_path(filename)
+        self._imagePath = path
+        ref = weakref.ref(self)
+
+        def loaded(image):
+            view = ref()
+            if view is None or view._imagePath != path:
+                # The view is gone or wants another image by now
+                if image is not None:
+                    GetAssetCache().Release(path)
+                return
+            view._set_image(path, image)
+
+        GetAssetCache().LoadAsync(path, loaded)
+
+    def ReleaseImage(self):
+        """ Drops the image and its reference in the asset cache. """
+        self._imagePath = None
+        self._set_image(None, None)
 
     def OnMeasure(self, width, height):
         if self.Image:
@@ -706,10 +2084,13 @@ class ImageView(View):
                                       self.Image.get_height())
         
     def OnDraw(self, surface):
-        surface.blit(self.Image, self.Rect)
+        if self.Image is not None:
+            self._blit(surface, self.Image, self.Rect.topleft)
 
 
 class CheckboxView(View):
+    __slots__ = ('Checked',)
+
     def __init__(self, context, checked:bool=False):
         super().__init__(context)
         self.Checked = checked
@@ -718,25 +2099,34 @@ class CheckboxView(View):
     def OnMeasure(self, width, height):
         self.SetMeasuredDimension(20, 20)
 
+    def OnSaveState(self):
+        return self.Checked
+
+    def OnRestoreState(self, state):
+        self.Checked = state
+
     def OnClick(self, pos:Point, view:View, button:int):
         print(f'OnClick({pos}, {view})')
         self.Checked = not self.Checked
+        self.Invalidate()
 
     def OnDraw(self, surface):
         inside = self.Rect.inflate(-2, -2)
-        pygame.draw.rect(surface, ALMOST_WHITE, inside)
-        pygame.draw.rect(surface, ALMOST_BLACK, self.Rect, 1)
+        self._rect(surface, ALMOST_WHITE, inside, 0)
+        self._rect(surface, ALMOST_BLACK, self.Rect, 1)
         if self.Checked:
             cross = inside.inflate(-2, -2)
-            pygame.draw.line(
+            self._line(
                 surface, ALMOST_BLACK, cross.topleft, cross.bottomright, 2
             )
-            pygame.draw.line(
+            self._line(
                 surface, ALMOST_BLACK, cross.topright, cross.bottomleft, 2
             )
 
 
 class DragInfo:
+    __slots__ = ('Offset', 'View', 'SaveX', 'SaveY', 'Dragging')
+
     def __init__(self):
         self.Offset:Point = None
         self.View:View = None
@@ -754,7 +2144,7 @@ class DragInfo:
 
     def Update(self, pos):
         if self.View is not None:
-            self.View.SetPosition(Point(pos) - self.Offset)
+            self.View.SetPosition(pos[0] - self.Offset.X, pos[1] - self.Offset.Y)
 
     def GetSavedViewPos(self):
         return (self.SaveX, self.SaveY)
@@ -771,57 +2161,376 @@ class DragInfo:
 
 
 class AppContext(PgApp):
-    def __init__(self, width, height):
+    def __init__(self, width, height, headless=False):
+        # In headless mode SDL's dummy video driver is used, so no display is
+        # needed, and frames are rendered to an offscreen surface with
+        # StepFrame. This must be decided before pygame opens the display.
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
         super().__init__(width, height, one_event_callback=True)
         self.Callback = None
+        self.Width = width
+        self.Height = height
+        self.Headless = headless
+        self._offscreen = pygame.Surface((width, height)) if headless else None
 
         self.ActivityStack = []
         self.Activities = {}
+        self._factories = {}
+        self.ReleaseInactive = False
 
         self.CurrentActivity = None
 
         self.ContentView = None
+        self.DirtyRects = []
+
+        self.BatchEvents = False
+        self.MaxEventsPerFrame = 64
+        self._pendingEvents = []
+
+        self.Profiler:FrameProfiler = None
+
+        self._preloadQueue = []
+        self._preloading = False
+
+        self.RenderOnDemand = False
+        self.FrameInterval = 1 / 60
+        self.IdleWait = 0.1
+        self._stopRequested = False
+        self._timers = []
+        self._timerSequence = 0
+        self._continuousRendering = 0
+        self._animator:Animator = None
+
+    def PreloadFonts(self, fonts):
+        """ Creates the fonts the application declares up front, so that the
+        first frames do not have to. Each font is a tuple (name, size) or
+        (name, size, bold, italic), see FontRegistry.Preload. """
+        GetFontRegistry().Preload(fonts)
+
+    def GetAnimator(self) -> Animator:
+        """ Returns the animator that runs the property animations of this
+        context, see Animator.Animate. """
+        if self._animator is None:
+            self._animator = Animator(self)
+        return self._animator
+
+    def SetRenderOnDemand(self, enabled, fps=60, idleWait=0.1):
+        """ In render-on-demand mode MainTask only draws a frame when an event
+        arrived, something was invalidated, a timer fired or continuous
+        rendering was requested. Otherwise it sleeps until the next timer is
+        due, and polls for events less and less often the longer it stays
+        idle, down to once every idleWait seconds. The sleeping is done with
+        asyncio, so other tasks keep running, and input that follows a long
+        idle period is handled within idleWait seconds. Only the redrawn
+        regions are pushed to the screen in this mode, without it the loop of
+        PgApp flips the whole window every frame. """
+        self.RenderOnDemand = enabled
+        self.FrameInterval = 1 / fps
+        self.IdleWait = idleWait
+
+    def BeginContinuousRendering(self):
+        """ Keeps frames coming in render-on-demand mode, for example while an
+        animation runs. Each call must be matched by EndContinuousRendering. """
+        self._continuousRendering += 1
+
+    def EndContinuousRendering(self):
+        if self._continuousRendering > 0:
+            self._continuousRendering -= 1
+
+    def PostDelayed(self, callback, delay):
+        """ Calls callback() on the main thread after delay seconds. """
+        self._timerSequence += 1
+        heapq.heappush(self._timers, (time.monotonic() + delay, self._timerSequence, callback))
+
+    def _run_timers(self) -> bool:
+        now = time.monotonic()
+        fired = False
+        while self._timers and self._timers[0][0] <= now:
+            _, _, callback = heapq.heappop(self._timers)
+            callback()
+            fired = True
+        return fired
+
+    def NeedsFrame(self) -> bool:
+        """ Tells if there is anything to draw. """
+        activity = self.CurrentActivity
+        return self._continuousRendering > 0 or bool(self._pendingEvents) or \
+            (activity is not None and activity.NeedsRender())
+
+    def RequestStop(self):
+        self._stopRequested = True
+        super().RequestStop()
+
+    async def MainTask(self):
+        if not self.RenderOnDemand:
+            return await super().MainTask()
+
+        self._stopRequested = False
+        idle = 0
+        while not self._stopRequested:
+            start = time.monotonic()
+            events = pygame.event.get()
+            for event in events:
+                self.OnEvent(event)
+            fired = self._run_timers()
+            GetAssetCache().DeliverLoaded()
+            if events or fired or self.NeedsFrame():
+                self.OnDraw(self.GetSurface())
+            elif self._preloadQueue:
+                self._preload_step()
+            else:
+                idle += 1
+                await asyncio.sleep(self._idle_delay(idle))
+                continue
+            idle = 0
+            await asyncio.sleep(max(0, self.FrameInterval - (time.monotonic() - start)))
+
+    def _idle_delay(self, idle) -> float:
+        # The delay doubles with each idle pass, up to IdleWait
+        delay = min(self.IdleWait, self.FrameInterval * 2 ** min(idle - 1, 16))
+        if self._timers:
+            delay = min(delay, self._timers[0][0] - time.monotonic())
+        if GetAssetCache().IsLoading():
+            # Decoded images are only picked up by polling
+            delay = min(delay, self.FrameInterval)
+        return max(0, delay)
+
+    def EnableProfiler(self, hud=False, window=300) -> FrameProfiler:
+        """ Starts timing the phases of each frame and the view classes. With
+        hud=True the statistics are drawn on top of the content. """
+        self.Profiler = FrameProfiler(window, hud)
+        self.Invalidate()
+        return self.Profiler
+
+    def DisableProfiler(self):
+        self.Profiler = None
+        self.Invalidate()
+
+    def _phase(self, phase):
+        if self.Profiler is None:
+            return nullcontext()
+        return self.Profiler.Phase(phase)
+
+    def SetEventBatching(self, enabled, maxEventsPerFrame=64):
+        """ When enabled, events are collected and handed to the current activity
+        once per frame, with consecutive mouse motion coalesced. If a frame has
+        more than maxEventsPerFrame events, stale motion events are dropped. """
+        if not enabled and self._pendingEvents:
+            self.DispatchEvents()
+        self.BatchEvents = enabled
+        self.MaxEventsPerFrame = maxEventsPerFrame
 
     def OnEvent(self, event):
-        self.CurrentActivity.DefaultEventHandler(event)
+        if self.BatchEvents:
+            self._pendingEvents.append(event)
+        else:
+            with self._phase('events'):
+                self.CurrentActivity.DefaultEventHandler(event)
+
+    def DispatchEvents(self):
+        """ Hands the events collected since the last frame to the current
+        activity. Called at the start of each frame in batched mode. """
+        if not self._pendingEvents:
+            return
+        events = CoalesceEvents(self._pendingEvents, self.MaxEventsPerFrame)
+        self._pendingEvents = []
+        with self._phase('events'):
+            self.CurrentActivity.OnEvents(events)
 
     def OnDraw(self, surface):
-        self.CurrentActivity.Render(surface)
+        self._run_timers()
+        GetAssetCache().DeliverLoaded()
+        self.DispatchEvents()
+        if self._animator is not None:
+            self._animator.Step()
+        self.DirtyRects = self.CurrentActivity.Render(surface)
+        self.UpdateDisplay(self.DirtyRects)
+        if self.Profiler is not None:
+            self.Profiler.EndFrame()
+        if self._preloadQueue:
+            self._preload_step()
+
+    def UpdateDisplay(self, rects):
+        """ Pushes the given regions of the window surface to the screen.
+        This only saves work in render-on-demand mode. Otherwise the loop of
+        PgApp flips the whole window after each frame anyway. """
+        if rects and not self.Headless:
+            pygame.display.update(rects)
+
+    def GetSurface(self) -> pygame.Surface:
+        """ Returns the surface frames are rendered to. """
+        if self._offscreen is not None:
+            return self._offscreen
+        return pygame.display.get_surface()
+
+    def StepFrame(self, events=()):
+        """ Runs a single frame outside of the real-time main loop. The given
+        events are handled and the current activity rendered. Returns the
+        regions that were redrawn. """
+        for event in events:
+            self.OnEvent(event)
+        self.OnDraw(self.GetSurface())
+        return self.DirtyRects
+
+    def Invalidate(self, rect=None):
+        """ Marks a region of the window as in need of redrawing. """
+        if self.CurrentActivity and not self._preloading:
+            self.CurrentActivity.Invalidate(rect)
+
+    def RequestLayout(self):
+        """ Schedules a measure and layout pass before the next frame. """
+        if self.CurrentActivity and not self._preloading:
+            self.CurrentActivity.RequestLayout()
+
+    def PreloadActivities(self, names=None, callback=None):
+        """ Builds the content of registered activities ahead of time, so that
+        starting or switching to them is instant. Without names all registered
+        activities are preloaded. The work is done in small steps, one per
+        frame: running OnInit, measuring and laying out. callback(activity) is
+        called for each activity when it is ready. Building views uses pygame
+        fonts, which are not thread safe, so it runs on the main thread; images
+        can be loaded in the background with ImageView.LoadImageAsync. """
+        if names is None:
+            names = list(self.Activities.keys())
+            names += [name for name in self._factories if name not in self.Activities]
+        for name in names:
+            activity = self.GetActivity(name)
+            if activity is None:
+                logging.error(f'Can\'t find activity "{name}"')
+                continue
+            if activity.IsReady() or activity is self.CurrentActivity:
+                continue
+            self._preloadQueue.append((activity, activity._preload(self.Width, self.Height),
+                                       callback))
+
+    def IsActivityReady(self, activityName) -> bool:
+        # Activities that have not been created yet are not ready
+        activity = self.Activities.get(activityName)
+        return activity is not None and activity.IsReady()
+
+    def _preload_step(self):
+        activity, steps, callback = self._preloadQueue[0]
+        if activity is self.CurrentActivity:
+            # Started before it was done, Render takes care of the rest
+            self._preloadQueue.pop(0)
+            steps.close()
+            return
+        self._preloading = True
+        try:
+            next(steps)
+            return
+        except StopIteration:
+            pass
+        finally:
+            self._preloading = False
+        self._preloadQueue.pop(0)
+        if callback is not None and activity.IsReady():
+            callback(activity)
 
     def RegisterActivity(self, activity):
         name = activity.GetName()
-        if name in self.Activities:
+        if name in self.Activities or name in self._factories:
             logging.error(f"There is already an acticity called {name}")
             raise RuntimeError(f'Activity "{name}" already registered')
         self.Activities[name] = activity
         return activity
 
+    def RegisterActivityFactory(self, name, factory, keep=True):
+        """ Registers an activity that is only created when it is first
+        started. factory is called as factory(context, name) and is either a
+        callable, like the Activity subclass, or the path of one as a string,
+        'package.module:ClassName', whose module is only imported then. With
+        keep=False the activity is dropped again whenever it leaves the
+        activity stack, and created anew the next time it is started. """
+        if name in self.Activities or name in self._factories:
+            logging.error(f"There is already an acticity called {name}")
+            raise RuntimeError(f'Activity "{name}" already registered')
+        self._factories[name] = (factory, keep)
+
+    def GetActivity(self, activityName) -> Activity:
+        """ Returns the registered activity, creating it if it was registered
+        with a factory. Returns None for unknown names. """
+        activity = self.Activities.get(activityName)
+        if activity is not None or activityName not in self._factories:
+            return activity
+        factory = self._factories[activityName][0]
+        if isinstance(factory, str):
+            moduleName, _, attribute = factory.rpartition(':') if ':' in factory \
+                else factory.rpartition('.')
+            factory = getattr(importlib.import_module(moduleName), attribute)
+        activity = factory(self, activityName)
+        self.Activities[activityName] = activity
+        return activity
+
+    def DropInactiveActivities(self):
+        """ Drops the activities created by factories that are not on the
+        activity stack. They are created again when next started. """
+        for name in [name for name in self.Activities if name in self._factories]:
+            self._drop_activity(name)
+
+    def _drop_activity(self, name):
+        activity = self.Activities.get(name)
+        if activity is None or activity in self.ActivityStack:
+            return
+        del self.Activities[name]
+        self._preloadQueue = [entry for entry in self._preloadQueue if entry[0] is not activity]
+        activity.OnDestroy()
+
+    def SetReleaseInactive(self, enabled):
+        """ Releases the view tree of an activity when another one is shown,
+        keeping only a snapshot of its state, see Activity.Release. """
+        self.ReleaseInactive = enabled
+
+    def ReleaseInactiveActivities(self):
+        """ Releases the view trees of all activities but the current one. """
+        for activity in list(self.Activities.values()):
+            if activity is not self.CurrentActivity:
+                activity.Release()
+
+    # Drops an activity that left the stack if it was registered with
+    # keep=False, and releases it if inactive activities are released
+    def _activity_deactivated(self, activity):
+        name = activity.GetName()
+        entry = self._factories.get(name)
+        if entry is not None and not entry[1]:
+            self._drop_activity(name)
+        if self.ReleaseInactive and self.Activities.get(name) is activity:
+            activity.Release()
+
     def StartActivity(self, activityName):
-        if activityName in iter(self.Activities.keys()):
-            nextActivity = self.Activities[activityName]
+        nextActivity = self.GetActivity(activityName)
+        if nextActivity is not None:
             if nextActivity == self.CurrentActivity:
                 logging.warning(f'Cannot start the same activity "{activityName}" from itself.')
                 return
-            if self.CurrentActivity:
-                self.CurrentActivity.Deactivate()
+            previous = self.CurrentActivity
+            if previous:
+                previous.Deactivate()
             self.CurrentActivity = nextActivity
             self.ActivityStack.append(self.CurrentActivity)
             self.CurrentActivity.Activate()
+            if previous:
+                self._activity_deactivated(previous)
         else:
             logging.error(f'Can\'t find activity {activityName}')
 
     def SwitchToActivity(self, activityName):
-        if activityName in iter(self.Activities.keys()):
-            nextActivity = self.Activities[activityName]
+        nextActivity = self.GetActivity(activityName)
+        if nextActivity is not None:
             if nextActivity == self.CurrentActivity:
                 logging.warning(f'Cannot switch to the same activity "{activityName}" from itself.')
                 return
             if self.CurrentActivity:
                 self.CurrentActivity.Deactivate()
+            previous = self.CurrentActivity
             self.CurrentActivity = nextActivity
-            self.ActivityStack.pop()
+            if self.ActivityStack:
+                self.ActivityStack.pop()
             self.ActivityStack.append(self.CurrentActivity)
             self.CurrentActivity.Activate()
+            if previous is not None:
+                self._activity_deactivated(previous)
         else:
             logging.error(f'Can\'t find activity "{activityName}"')
 
@@ -832,8 +2541,10 @@ class AppContext(PgApp):
         if len(self.ActivityStack) == 0:
             self.RequestStop()
         else:
+            previous = self.CurrentActivity
             self.CurrentActivity = self.ActivityStack[-1]
             self.CurrentActivity.Activate()
+            self._activity_deactivated(previous)
 
 
 class Activity:
@@ -851,7 +2562,12 @@ class Activity:
         self.MouseUpView = None
         self.Initialized = False
         self.DragInfo = DragInfo()
+        self._dragScrolled = False
         self._layoutRequested = False
+        self._fullRedraw = True
+        self._dirtyRects = []
+        self._preloaded = False
+        self._snapshot:bytes = None
 
     def GetName(self):
         return self.Name
@@ -866,6 +2582,18 @@ class Activity:
     def HandleEvent(self, event):
         return False
 
+    # Is called once per frame with all events of the frame when the context
+    # batches events. Can be overridden by subclass.
+    def OnEvents(self, events):
+        context = self.Context
+        for i, event in enumerate(events):
+            self.DefaultEventHandler(event)
+            if context.CurrentActivity is not self or not context.ActivityStack:
+                # The event switched activity, the rest of the batch is for the new one
+                if context.ActivityStack and i + 1 < len(events):
+                    context.CurrentActivity.OnEvents(events[i + 1:])
+                return
+
     def DefaultEventHandler(self, event):
         if self.HandleEvent(event):
             return
@@ -884,6 +2612,7 @@ class Activity:
             return
 
         if event.type == pygame.MOUSEMOTION:
+            self.MousePos = event.pos
             self.HoverView  = self.ContentView.FindView(event.pos[0],
                                                         event.pos[1])
 
@@ -891,6 +2620,14 @@ class Activity:
                 if self.MouseDownView is not None and self.MouseDownView.Movable:
                     self.DragInfo.BeginDrag(event.pos, self.MouseDownView)
                     self.OnDragBegin(event.pos, self.MouseDownView)
+                else:
+                    # Offer the drag to the pressed view and then its parents
+                    dx, dy = getattr(event, 'rel', (0, 0))
+                    view = self.MouseDownView
+                    while view is not None and not view.OnMouseDrag(dx, dy):
+                        view = view.Parent
+                    if view is not None:
+                        self._dragScrolled = True
 
             if self.DragInfo.View:
                 self.DragInfo.Update(event.pos)
@@ -907,13 +2644,15 @@ class Activity:
             if fw != self.FocusView:
                 if fw is not None:
                     fw.Focus = False
+                    fw.Invalidate()
                 if self.FocusView is not None:
                     self.FocusView.Focus = True
+                    self.FocusView.Invalidate()
 
         elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
             self.MouseUpView = self.ContentView.FindView(event.pos[0],
                                                             event.pos[1])
-            if self.MouseUpView == self.MouseDownView:
+            if self.MouseUpView == self.MouseDownView and not self._dragScrolled:
                 if self.MouseDownView and not self.DragInfo.IsDragging():
                     if self.MouseDownView.Active:
                         self.MouseDownView.ClickAction(event.pos,
@@ -927,6 +2666,13 @@ class Activity:
             self.MouseDownView = None
             self.MouseDownPos = None
             self.MouseUpView = None
+            self._dragScrolled = False
+
+        elif event.type == pygame.MOUSEWHEEL:
+            # Offer the wheel to the view under the mouse and then its parents
+            view = self.ContentView.FindView(self.MousePos[0], self.MousePos[1])
+            while view is not None and not view.OnMouseWheel(event.x, event.y):
+                view = view.Parent
 
         if self.FocusView:
             self.FocusView.OnEvent(event)
@@ -937,17 +2683,61 @@ class Activity:
 
     def SetContentView(self, view):
         self.ContentView = view
+        self.Invalidate()
+
+    def Invalidate(self, rect=None):
+        """ Marks a region of the window as in need of redrawing. Without a rect
+        the whole window is redrawn on the next frame. """
+        if rect is None:
+            self._fullRedraw = True
+        elif rect[2] > 0 and rect[3] > 0:
+            self._dirtyRects.append(rect)
+
+    def NeedsRender(self) -> bool:
+        """ Tells if the next Render has anything to do. """
+        return self._fullRedraw or self._layoutRequested or bool(self._dirtyRects)
+
+    def RequestLayout(self):
+        """ Schedules a measure and layout pass before the next frame. Only the
+        views that requested a layout, and their ancestors, are measured again. """
+        self._layoutRequested = True
 
+    # Redraws the invalidated parts of the content view. Returns the list of
+    # updated regions in window coordinates, empty if nothing was drawn.
     def Render(self, surface):
-        if self.ContentView:
-            width = surface.get_width()
-            height = surface.get_height()
-            surface.fill(GRAY_50)
-            if self._layoutRequested:
+        if not self.ContentView:
+            return []
+        width = surface.get_width()
+        height = surface.get_height()
+        context = self.Context
+        if self._layoutRequested:
+            with context._phase('measure'):
                 self.ContentView.Measure(None, None)
+            with context._phase('layout'):
                 self.ContentView.Layout(0, 0, width, height)
-                self._layoutRequested = False
-            self.ContentView.Draw(surface)
+            self._layoutRequested = False
+
+        profiler = context.Profiler
+        if profiler is not None and profiler.Hud:
+            self.Invalidate(profiler.GetHudRect())
+
+        if self._fullRedraw:
+            dirty = [surface.get_rect()]
+        else:
+            dirty = CoalesceRects(self._dirtyRects, surface.get_rect())
+        self._fullRedraw = False
+        self._dirtyRects = []
+
+        with context._phase('draw'):
+            for rect in dirty:
+                surface.set_clip(rect)
+                surface.fill(GRAY_50, rect)
+                self.ContentView.Draw(surface)
+            surface.set_clip(None)
+
+        if profiler is not None and profiler.Hud:
+            profiler.DrawHud(surface)
+        return dirty
 
     def StartActivity(self, activityName):
         self.Context.StartActivity(activityName)
@@ -956,16 +2746,113 @@ class Activity:
         self.Context.SwitchToActivity(activityName)
 
     # Do not override
-    def Activate(self):
-        logging.debug(f'Activate "{self.Name}"')
-#        self.PushEventHandler(self.DefaultEventHandler)
+    def _initialize(self) -> bool:
         if not self.Initialized:
             self.OnInit()
             if self.ContentView is None:
                 logging.error("OnInit must set a content view")
-                return
+                return False
             self.Initialized = True
+            if self._snapshot is not None:
+                self.RestoreSnapshot(self._snapshot)
+                self._snapshot = None
+        return True
+
+    def SaveSnapshot(self) -> bytes:
+        """ Returns the state of the view tree: the rects, measured sizes and
+        cached layout of the views, and what views save with OnSaveState,
+        like the text of inputs and the state of checkboxes. """
+        records = []
+        stack = [self.ContentView]
+        while stack:
+            view = stack.pop()
+            specs = view._measureSpecs
+            if specs is not None:
+                specs = [None if spec is None else [spec.Mode, spec.Size] for spec in specs]
+            records.append([type(view).__name__, list(view.Rect),
+                            [view.MeasuredDimension.width, view.MeasuredDimension.height],
+                            view._layoutArgs, specs, view._layoutDirty, view.Visible,
+                            view.OnSaveState()])
+            stack.extend(reversed(view._snapshot_children()))
+        return zlib.compress(json.dumps(records, separators=(',', ':')).encode())
+
+    def RestoreSnapshot(self, snapshot:bytes) -> bool:
+        """ Applies a snapshot taken by SaveSnapshot to a view tree built the
+        same way, usually by OnInit. The views get back their rects and cached
+        layout, so no new measure and layout pass is needed. Returns False,
+        and changes nothing, if the tree does not match the snapshot. """
+        records = json.loads(zlib.decompress(snapshot))
+        views = []
+        stack = [self.ContentView]
+        while stack:
+            view = stack.pop()
+            views.append(view)
+            stack.extend(reversed(view._snapshot_children()))
+        if len(views) != len(records) or \
+                any(type(view).__name__ != record[0] for view, record in zip(views, records)):
+            logging.warning(f'Snapshot of "{self.Name}" does not match its views')
+            return False
+
+        for view, record in zip(views, records):
+            _, rect, measured, layoutArgs, specs, dirty, visible, state = record
+            view.Rect.update(rect)
+            view.SetMeasuredDimension(measured[0], measured[1])
+            view._layoutArgs = tuple(layoutArgs) if layoutArgs is not None else None
+            if specs is not None:
+                specs = tuple(None if spec is None else MeasureSpec(spec[0], spec[1])
+                              for spec in specs)
+            view._measureSpecs = specs
+            view._layoutDirty = dirty
+            view.Visible = visible
+            view._rect_changed()
+            if state is not None:
+                view.OnRestoreState(state)
         self._layoutRequested = True
+        self._fullRedraw = True
+        return True
+
+    def Release(self):
+        """ Drops the view tree, keeping a snapshot of its state. The tree is
+        built again by OnInit, with the state of the snapshot, the next time the
+        activity is shown. """
+        if not self.Initialized or self.ContentView is None or \
+                self.Context.CurrentActivity is self:
+            return
+        self._snapshot = self.SaveSnapshot()
+        self.ContentView = None
+        self.Initialized = False
+        self._preloaded = False
+        self.FocusView = None
+        self.HoverView = None
+        self.MouseDownView = None
+        self.MouseUpView = None
+        self.DragInfo = DragInfo()
+
+    # Do not override. Builds, measures and lays out the content one step at a
+    # time, see AppContext.PreloadActivities.
+    def _preload(self, width, height):
+        if not self.Initialized:
+            if not self._initialize():
+                return
+            yield
+        self.ContentView.Measure(None, None)
+        yield
+        self.ContentView.Layout(0, 0, width, height)
+        self._preloaded = True
+
+    def IsReady(self) -> bool:
+        """ Tells if the content is built and laid out, so that the activity can
+        be shown without delay. """
+        return self.Initialized and (self._preloaded or self.Context.CurrentActivity is self)
+
+    # Do not override
+    def Activate(self):
+        logging.debug(f'Activate "{self.Name}"')
+#        self.PushEventHandler(self.DefaultEventHandler)
+        if not self._initialize():
+            return
+        self._layoutRequested = True
+        self._fullRedraw = True
         self.OnActivate()
 
     # Do not override
@@ -980,6 +2867,11 @@ class Activity:
     def OnDeactivate(self):
         pass
 
+    # Called when the context drops an activity created by a factory, see
+    # AppContext.RegisterActivityFactory
+    def OnDestroy(self):
+        pass
+
     def OnDragBegin(self, pos, view):
         pass
 
@@ -0,0 +1,289 @@
+""" Declarative layouts.
+
+A layout file is JSON describing a view tree:
+
+    {"version": 1,
+     "root": {"type": "LinearLayout", "orientation": "vertical",
+              "children": [{"type": "TextView", "id": "title", "text": "Hello"},
+                           {"type": "ButtonView", "id": "ok", "text": "OK",
+                            "backgroundColor": [0, 128, 0]}]}}
+
+The layout is validated and compiled once into a LayoutTemplate, a flat list
+of construction steps. Inflating the template only runs those steps.
+Compiled templates are stored in the cache directory under the hash of the
+file content, so later runs skip the validation as well.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+from .common import GetCacheDir, Point
+from .guicore import AbsoluteLayout, ButtonView, CENTER, CENTER_HORIZONTAL, CENTER_VERTICAL, \
+    GridLayout, ImageView, LinearLayout, TextView, View, ViewGroup
+
+LAYOUT_VERSION = 1
+# Bump when the compiled form changes, so that old cached templates are ignored
+TEMPLATE_VERSION = 3
+
+
+class LayoutError(ValueError):
+    pass
+
+
+def _number(value, where):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise LayoutError(f'{where}: expected a number, got {value!r}')
+    return value
+
+def _int(value, where):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise LayoutError(f'{where}: expected an integer, got {value!r}')
+    return value
+
+def _positive(value, where):
+    if _int(value, where) < 1:
+        raise LayoutError(f'{where}: expected a positive integer, got {value!r}')
+    return value
+
+def _bool(value, where):
+    if not isinstance(value, bool):
+        raise LayoutError(f'{where}: expected true or false, got {value!r}')
+    return value
+
+def _str(value, where):
+    if not isinstance(value, str):
+        raise LayoutError(f'{where}: expected a string, got {value!r}')
+    return value
+
+def _pair(value, where):
+    if not isinstance(value, list) or len(value) != 2:
+        raise LayoutError(f'{where}: expected [width, height], got {value!r}')
+    return [_number(v, where) for v in value]
+
+def _point(value, where):
+    if not isinstance(value, list) or len(value) != 2:
+        raise LayoutError(f'{where}: expected [x, y], got {value!r}')
+    return Point([_number(v, where) for v in value]).to_json(LAYOUT_VERSION)
+
+def _color(value, where):
+    if not isinstance(value, list) or len(value) not in (3, 4) or \
+            not all(isinstance(v, int) and 0 <= v <= 255 for v in value):
+        raise LayoutError(f'{where}: expected [r, g, b] with values 0-255, got {value!r}')
+    return value
+
+def _orientation(value, where):
+    orientations = {'vertical': LinearLayout.VERTICAL, 'horizontal': LinearLayout.HORIZONTAL}
+    if value not in orientations:
+        raise LayoutError(f'{where}: expected "vertical" or "horizontal", got {value!r}')
+    return orientations[value]
+
+def _gravity(value, where):
+    gravities = {'none': 0, 'center': CENTER, 'center_horizontal': CENTER_HORIZONTAL,
+                 'center_vertical': CENTER_VERTICAL}
+    if value not in gravities:
+        raise LayoutError(f'{where}: expected one of {", ".join(gravities)}, got {value!r}')
+    return gravities[value]
+
+
+# Each property is applied by calling a method or by setting an attribute
+_CALL = 0
+_SET = 1
+
+# Properties of all views, in the order they are applied
+_VIEW_PROPERTIES = (
+    ('position', _point, _CALL, 'SetPosition'),
+    ('size', _pair, _CALL, 'SetSize'),
+    ('minSize', _pair, _CALL, 'SetMinDimension'),
+    ('padding', _int, _CALL, 'SetPadding'),
+    ('margin', _int, _CALL, 'SetMargin'),
+    ('backgroundColor', _color, _CALL, 'SetBackgroundColor'),
+    ('visible', _bool, _SET, 'Visible'),
+    ('movable', _bool, _SET, 'Movable'),
+    ('focusable', _bool, _SET, 'Focusable'),
+)
+
+_TEXT_PROPERTIES = _VIEW_PROPERTIES + (
+    ('textSize', _int, _SET, 'TextSize'),
+    ('textColor', _color, _SET, 'TextColor'),
+    ('fontName', _str, _SET, 'FontName'),
+    ('bold', _bool, _SET, 'Bold'),
+    ('italic', _bool, _SET, 'Italic'),
+    ('gravity', _gravity, _CALL, 'SetGravity'),
+    ('glyphAtlas', _bool, _CALL, 'SetGlyphAtlas'),
+    ('multiLine', _bool, _CALL, 'SetMultiLine'),
+    ('wrapWidth', _int, _CALL, 'SetMultiLine'),
+)
+
+_REQUIRED = object()
+
+# type: (class, constructor arguments as (name, check, default), properties)
+_TYPES = {
+    'LinearLayout': (LinearLayout, (('orientation', _orientation, LinearLayout.VERTICAL),),
+                     _VIEW_PROPERTIES),
+    'GridLayout': (GridLayout, (('rows', _positive, _REQUIRED), ('columns', _positive, _REQUIRED)),
+                   _VIEW_PROPERTIES),
+    'AbsoluteLayout': (AbsoluteLayout, (), _VIEW_PROPERTIES),
+    'TextView': (TextView, (('text', _str, ''),), _TEXT_PROPERTIES),
+    'ButtonView': (ButtonView, (('text', _str, ''),), _TEXT_PROPERTIES),
+    'ImageView': (ImageView, (('src', _str, None), ('async', _bool, False)), _VIEW_PROPERTIES),
+}
+
+
+def _compile_node(node, where, parent, steps):
+    if not isinstance(node, dict):
+        raise LayoutError(f'{where}: expected an object, got {node!r}')
+    typeName = node.get('type')
+    if typeName not in _TYPES:
+        raise LayoutError(f'{where}: unknown type {typeName!r}, expected one of {", ".join(_TYPES)}')
+    cls, parameters, properties = _TYPES[typeName]
+    known = {'type', 'id', 'children'}
+
+    args = []
+    for name, check, default in parameters:
+        known.add(name)
+        if name in node:
+            args.append(check(node[name], f'{where}.{name}'))
+        elif default is _REQUIRED:
+            raise LayoutError(f'{where}: {typeName} needs "{name}"')
+        else:
+            args.append(default)
+
+    setters = []
+    for name, check, kind, target in properties:
+        known.add(name)
+        if name not in node:
+            continue
+        value = check(node[name], f'{where}.{name}')
+        if kind == _CALL:
+            # Calls take a list of arguments
+            if name == 'wrapWidth':
+                value = [True, value]
+            elif check not in (_pair, _point):
+                value = [value]
+        setters.append([kind, target, value])
+
+    unknown = set(node) - known
+    if unknown:
+        raise LayoutError(f'{where}: unknown properties {", ".join(sorted(unknown))} for {typeName}')
+    if 'wrapWidth' in node and node.get('multiLine') is False:
+        raise LayoutError(f'{where}: wrapWidth needs multiLine')
+
+    ident = node.get('id')
+    if ident is not None:
+        _str(ident, f'{where}.id')
+
+    index = len(steps)
+    steps.append([parent, typeName, args, setters, ident])
+    children = node.get('children', [])
+    if not isinstance(children, list):
+        raise LayoutError(f'{where}.children: expected a list')
+    if children and not issubclass(cls, ViewGroup):
+        raise LayoutError(f'{where}: {typeName} can\'t have children')
+    for i, child in enumerate(children):
+        _compile_node(child, f'{where}.children[{i}]', index, steps)
+
+
+def _compile(data) -> list:
+    if not isinstance(data, dict) or 'root' not in data:
+        raise LayoutError('layout: expected an object with "root"')
+    version = data.get('version', LAYOUT_VERSION)
+    if version != LAYOUT_VERSION:
+        raise LayoutError(f'layout: unsupported version {version!r}')
+    steps = []
+    _compile_node(data['root'], 'root', -1, steps)
+    return steps
+
+
+# Colors are lists in JSON, but are used as cache keys, so they must be tuples
+def _tuple(value):
+    return tuple(value) if isinstance(value, list) else value
+
+def _tuples(args):
+    return tuple(_tuple(arg) for arg in args)
+
+
+class LayoutTemplate:
+    """ A compiled layout. Inflate builds a new view tree from it. """
+    def __init__(self, steps):
+        self._steps = [(parent, _TYPES[typeName][0], tuple(args),
+                        tuple((kind, target, _tuples(value) if kind == _CALL else _tuple(value))
+                              for kind, target, value in setters),
+                        ident)
+                       for parent, typeName, args, setters, ident in steps]
+
+    def __len__(self):
+        return len(self._steps)
+
+    def Inflate(self, context, ids:dict=None) -> View:
+        """ Builds the view tree and returns its root. Views with an id are
+        added to ids when a dict is given. """
+        views = []
+        for parent, cls, args, setters, ident in self._steps:
+            view = cls(context, *args)
+            for kind, target, value in setters:
+                if kind == _CALL:
+                    getattr(view, target)(*value)
+                else:
+                    setattr(view, target, value)
+            if parent >= 0:
+                views[parent].AddChild(view)
+            if ident is not None and ids is not None:
+                ids[ident] = view
+            views.append(view)
+        return views[0]
+
+
+def CompileLayout(data) -> LayoutTemplate:
+    """ Validates and compiles a layout given as a dict or a JSON string. """
+    if isinstance(data, (str, bytes)):
+        try:
+            data = json.loads(data)
+        except ValueError as e:
+            raise LayoutError(f'layout: {e}') from None
+    return LayoutTemplate(_compile(data))
+
+
+_templates = {}
+
+def LoadLayout(path, cacheDir=None) -> LayoutTemplate:
+    """ Returns the compiled template of a layout file. Templates are kept in
+    memory, and on disk under the hash of the file content, so a layout is
+    only validated and compiled the first time it is seen. """
+    with open(path, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    template = _templates.get(digest)
+    if template is not None:
+        return template
+
+    if cacheDir is None:
+        cacheDir = os.path.join(GetCacheDir(), 'layouts')
+    cachePath = os.path.join(cacheDir, digest + '.json')
+    steps = None
+    try:
+        with open(cachePath) as f:
+            cached = json.load(f)
+        if cached.get('version') == TEMPLATE_VERSION:
+            steps = cached['steps']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if steps is None:
+        try:
+            data = json.loads(content)
+        except ValueError as e:
+            raise LayoutError(f'{path}: {e}') from None
+        steps = _compile(data)
+        try:
+            os.makedirs(cacheDir, exist_ok=True)
+            temp = cachePath + '.tmp'
+            with open(temp, 'w') as f:
+                json.dump({'version': TEMPLATE_VERSION, 'steps': steps}, f)
+            os.replace(temp, cachePath)
+        except OSError as e:
+            logging.debug(f'Could not write layout cache "{cachePath}": {e}')
+
+    template = LayoutTemplate(steps)
+    _templates[digest] = template
+    return template
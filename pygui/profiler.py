@@ -0,0 +1,106 @@
+from __future__ import annotations
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from time import perf_counter
+import pygame
+from .text import GetGlyphAtlas
+
+
+def Percentile(values, percent):
+    """ Nearest-rank percentile of a sorted sequence. """
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(percent / 100 * len(values))) - 1))
+    return values[index]
+
+
+class FrameProfiler:
+    """ Times the phases of each frame (event dispatch, measure, layout and draw)
+    and attributes time to view classes. The last frames are kept in rolling
+    windows from which p50, p95 and p99 are computed.
+
+    Time attributed to a view class is exclusive: time spent in the children of
+    a view is counted for the children's classes only. """
+    PHASES = ('events', 'measure', 'layout', 'draw')
+    HUD_LINES = 10
+    HUD_LINE_HEIGHT = 14
+
+    def __init__(self, window=300, hud=False):
+        self.Window = window
+        self.Hud = hud
+        self.Frames = 0
+        self._phases = {phase: deque(maxlen=window) for phase in self.PHASES}
+        self._frames = deque(maxlen=window)
+        self._views = defaultdict(lambda: deque(maxlen=window))
+        self._framePhases = dict.fromkeys(self.PHASES, 0.0)
+        self._frameViews = defaultdict(float)
+        self._stack = []
+
+    @contextmanager
+    def Phase(self, phase):
+        """ Adds the time spent in the with block to a phase of this frame. """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self._framePhases[phase] += perf_counter() - start
+
+    def BeginView(self) -> float:
+        self._stack.append(0.0)
+        return perf_counter()
+
+    def EndView(self, phase, view, start):
+        elapsed = perf_counter() - start
+        children = self._stack.pop()
+        if self._stack:
+            self._stack[-1] += elapsed
+        self._frameViews[(phase, type(view).__name__)] += elapsed - children
+
+    def EndFrame(self):
+        """ Moves the times of the current frame into the rolling windows. """
+        for phase, elapsed in self._framePhases.items():
+            self._phases[phase].append(elapsed)
+        self._frames.append(sum(self._framePhases.values()))
+        for key, elapsed in self._frameViews.items():
+            self._views[key].append(elapsed)
+        self._framePhases = dict.fromkeys(self.PHASES, 0.0)
+        self._frameViews = defaultdict(float)
+        self.Frames += 1
+
+    def GetPercentiles(self, phase=None) -> tuple[float, float, float]:
+        """ Returns p50, p95 and p99 in seconds of a phase, or of whole frames. """
+        values = sorted(self._frames if phase is None else self._phases[phase])
+        return (Percentile(values, 50), Percentile(values, 95), Percentile(values, 99))
+
+    def GetViewTimes(self, phase=None) -> list[tuple[str, str, float]]:
+        """ Returns (phase, class name, mean seconds per frame) sorted by time. """
+        result = []
+        for (viewPhase, name), values in self._views.items():
+            if phase is None or viewPhase == phase:
+                result.append((viewPhase, name, sum(values) / max(1, len(self._frames))))
+        result.sort(key=lambda item: item[2], reverse=True)
+        return result
+
+    def GetReport(self) -> dict:
+        report = {'frames': self.Frames,
+                  'frame': self.GetPercentiles(),
+                  'views': self.GetViewTimes()}
+        for phase in self.PHASES:
+            report[phase] = self.GetPercentiles(phase)
+        return report
+
+    def GetHudRect(self) -> pygame.Rect:
+        return pygame.Rect(0, 0, 300, self.HUD_LINES * self.HUD_LINE_HEIGHT)
+
+    def DrawHud(self, surface):
+        rect = self.GetHudRect()
+        surface.fill((0, 0, 0), rect)
+        glyphs = GetGlyphAtlas('monospace', 12, False, False, (255, 255, 0))
+        lines = ['%-8s %6s %6s %6s' % ('ms', 'p50', 'p95', 'p99')]
+        for phase in ('frame',) + self.PHASES:
+            p = self.GetPercentiles(None if phase == 'frame' else phase)
+            lines.append('%-8s %6.2f %6.2f %6.2f' % (phase, p[0] * 1000, p[1] * 1000, p[2] * 1000))
+        for phase, name, elapsed in self.GetViewTimes()[:self.HUD_LINES - len(lines)]:
+            lines.append('%-8s %-14.14s %6.2f' % (phase, name, elapsed * 1000))
+        for i, line in enumerate(lines):
+            glyphs.Draw(surface, (rect.left + 4, rect.top + i * self.HUD_LINE_HEIGHT), line)
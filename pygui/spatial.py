@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+
+class SpatialGrid:
+    """ Uniform grid for looking up items by position. Each item is stored in
+    every cell its rectangle overlaps, so a point lookup only has to look at
+    the items of a single cell. """
+    def __init__(self, cellSize=64):
+        self.CellSize = cellSize
+        self._cells = {}
+        self._itemCells = {}
+
+    def __len__(self):
+        return len(self._itemCells)
+
+    def __contains__(self, item):
+        return item in self._itemCells
+
+    def _cells_of(self, rect):
+        x, y, w, h = rect
+        if w <= 0 or h <= 0:
+            return ()
+        size = self.CellSize
+        return [(cx, cy)
+                for cx in range(x // size, (x + w - 1) // size + 1)
+                for cy in range(y // size, (y + h - 1) // size + 1)]
+
+    def Insert(self, item, rect):
+        self.Update(item, rect)
+
+    def Update(self, item, rect):
+        """ Inserts the item or moves it to a new rectangle. """
+        cells = self._cells_of(rect)
+        old = self._itemCells.get(item)
+        if old == cells:
+            return
+        if old:
+            self._remove_from(item, old)
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket is None:
+                self._cells[cell] = [item]
+            else:
+                bucket.append(item)
+        self._itemCells[item] = cells
+
+    def Remove(self, item):
+        cells = self._itemCells.pop(item, None)
+        if cells:
+            self._remove_from(item, cells)
+
+    def _remove_from(self, item, cells):
+        for cell in cells:
+            bucket = self._cells[cell]
+            bucket.remove(item)
+            if not bucket:
+                del self._cells[cell]
+
+    def Query(self, x, y) -> list:
+        """ Returns the items whose cells contain the point. The caller still has
+        to check that the point is inside each item. """
+        size = self.CellSize
+        return self._cells.get((int(x) // size, int(y) // size), ())
+
+    def Clear(self):
+        self._cells.clear()
+        self._itemCells.clear()
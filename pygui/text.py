@@ -0,0 +1,305 @@
+from __future__ import annotations
+from collections import OrderedDict
+from functools import lru_cache
+import pygame
+from .fonts import GetFontRegistry
+
+
+# Creating a font object is expensive, so fonts come from the shared registry
+def GetFont(name, size, bold, italic) -> pygame.font.Font:
+    return GetFontRegistry().GetFont(name, size, bold, italic)
+
+
+class GlyphMetrics:
+    """ Cached advances and kerning of one font and style. Text is measured by
+    summing the advance of each character and the kerning of each pair, so the
+    font is only asked about characters and pairs it has not seen before. """
+    def __init__(self, name, size, bold, italic):
+        self.Font = GetFont(name, size, bold, italic)
+        self.Height = self.Font.size(' ')[1]
+        self._advances = {}
+        self._kernings = {}
+
+    def Advance(self, char) -> int:
+        advance = self._advances.get(char)
+        if advance is None:
+            advance = self.Font.size(char)[0]
+            self._advances[char] = advance
+        return advance
+
+    def Kerning(self, left, right) -> int:
+        pair = left + right
+        kerning = self._kernings.get(pair)
+        if kerning is None:
+            kerning = self.Font.size(pair)[0] - self.Advance(left) - self.Advance(right)
+            self._kernings[pair] = kerning
+        return kerning
+
+    def Offsets(self, text) -> list[int]:
+        """ Returns the x offset of each character followed by the total width. """
+        offsets = []
+        x = 0
+        prev = None
+        for char in text:
+            if prev is not None:
+                x += self.Kerning(prev, char)
+            offsets.append(x)
+            x += self.Advance(char)
+            prev = char
+        offsets.append(x)
+        return offsets
+
+    def Width(self, text) -> int:
+        width = 0
+        prev = None
+        for char in text:
+            if prev is not None:
+                width += self.Kerning(prev, char)
+            width += self.Advance(char)
+            prev = char
+        return width
+
+    def Size(self, text) -> tuple[int, int]:
+        return (self.Width(text), self.Height)
+
+
+@lru_cache(maxsize=64)
+def GetGlyphMetrics(name, size, bold, italic) -> GlyphMetrics:
+    return GlyphMetrics(name, size, bold, italic)
+
+
+# Measured from the cached glyph metrics, so the size is the one of the text
+# composed from the glyph atlas. Text rendered with font.render can be a few
+# pixels wider.
+def MeasureText(text, name, size, bold, italic):
+    return GetGlyphMetrics(name, size, bold, italic).Size(text)
+
+
+def _break_word(word, width, metrics) -> list[str]:
+    pieces = []
+    start = 0
+    x = 0
+    for i, char in enumerate(word):
+        advance = metrics.Advance(char)
+        if x + advance > width and i > start:
+            pieces.append(word[start:i])
+            start = i
+            x = 0
+        x += advance
+    pieces.append(word[start:])
+    return pieces
+
+
+@lru_cache(maxsize=16384)
+def BreakParagraph(paragraph, width, name, size, bold, italic) -> tuple[str, ...]:
+    """ Breaks a paragraph into lines no wider than width, at spaces when
+    possible. A width of None keeps the paragraph on one line. """
+    if width is None or not paragraph:
+        return (paragraph,)
+    metrics = GetGlyphMetrics(name, size, bold, italic)
+    space = metrics.Advance(' ')
+    lines = []
+    line = None
+    lineWidth = 0
+    for word in paragraph.split(' '):
+        wordWidth = metrics.Width(word)
+        if line is not None and lineWidth + space + wordWidth <= width:
+            line += ' ' + word
+            lineWidth += space + wordWidth
+            continue
+        if line is not None:
+            lines.append(line)
+        if wordWidth > width:
+            pieces = _break_word(word, width, metrics)
+            lines.extend(pieces[:-1])
+            word = pieces[-1]
+            wordWidth = metrics.Width(word)
+        line = word
+        lineWidth = wordWidth
+    lines.append(line)
+    return tuple(lines)
+
+
+class WrappedText:
+    """ Text broken into lines that fit a width. The lines are kept per
+    paragraph, so Append only breaks the last paragraph and the new ones
+    again. Update breaks all paragraphs again, but the lines of paragraphs
+    seen before come from the BreakParagraph cache. """
+    def __init__(self):
+        self.Lines:list[str] = ['']
+        self.MaxWidth = 0
+        self._paragraphs = ['']
+        self._starts = [0]
+        self._key = None
+
+    def __len__(self):
+        return len(self.Lines)
+
+    def Matches(self, width, name, size, bold, italic) -> bool:
+        """ Returns True if the lines were broken with these parameters. """
+        return self._key == (width, name, size, bold, italic)
+
+    def Update(self, text, width, name, size, bold, italic):
+        self._key = (width, name, size, bold, italic)
+        self._paragraphs = text.split('\n')
+        self.Lines = []
+        self._starts = []
+        self.MaxWidth = 0
+        self._break(0)
+
+    def Append(self, text):
+        """ Adds text at the end of the text given to Update. """
+        added = text.split('\n')
+        last = len(self._paragraphs) - 1
+        self._paragraphs[last] += added[0]
+        self._paragraphs.extend(added[1:])
+        del self.Lines[self._starts[last]:]
+        del self._starts[last:]
+        self._break(last)
+
+    def _break(self, first):
+        width, name, size, bold, italic = self._key
+        lines = self.Lines
+        for paragraph in self._paragraphs[first:]:
+            self._starts.append(len(lines))
+            broken = BreakParagraph(paragraph, width, name, size, bold, italic)
+            lines.extend(broken)
+            for line in broken:
+                lineWidth = MeasureText(line, name, size, bold, italic)[0]
+                if lineWidth > self.MaxWidth:
+                    self.MaxWidth = lineWidth
+
+
+class TextCache:
+    """ LRU cache of rendered text surfaces. The cache is bounded by the number
+    of bytes used by the pixels of the cached surfaces. """
+    def __init__(self, maxBytes=8 * 1024 * 1024):
+        self.MaxBytes = maxBytes
+        self.Bytes = 0
+        self.Hits = 0
+        self.Misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def Render(self, text, name, size, bold, italic, color, antialias=True) -> pygame.Surface:
+        """ Returns the rendered text. The surface is shared, so do not draw
+        on it. """
+        key = (text, name, size, bold, italic, tuple(color), antialias)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.Hits += 1
+            return entry[0]
+
+        self.Misses += 1
+        font = GetFont(name, size, bold, italic)
+        surface = font.render(text, antialias, color)
+        nbytes = surface.get_pitch() * surface.get_height()
+        if nbytes <= self.MaxBytes:
+            self._entries[key] = (surface, nbytes)
+            self.Bytes += nbytes
+            self._evict(self.MaxBytes)
+        return surface
+
+    def SetMaxBytes(self, maxBytes):
+        self.MaxBytes = maxBytes
+        self._evict(maxBytes)
+
+    def Clear(self):
+        self._entries.clear()
+        self.Bytes = 0
+
+    def GetStats(self) -> dict:
+        return {'entries': len(self._entries),
+                'bytes': self.Bytes,
+                'max_bytes': self.MaxBytes,
+                'hits': self.Hits,
+                'misses': self.Misses}
+
+    def _evict(self, maxBytes):
+        while self.Bytes > maxBytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.Bytes -= nbytes
+
+
+_textCache = TextCache()
+
+def GetTextCache() -> TextCache:
+    return _textCache
+
+
+def RenderText(text, name, size, bold, italic, color, antialias=True) -> pygame.Surface:
+    """ Renders text through the shared text cache. """
+    return _textCache.Render(text, name, size, bold, italic, color, antialias)
+
+
+class GlyphAtlas:
+    """ Glyphs of one font, style and color rendered once into a shared atlas
+    surface. Strings are drawn by blitting one glyph per character, which makes
+    text that changes every frame cheap to draw. Glyphs missing from the atlas
+    are added on first use. """
+    ATLAS_WIDTH = 512
+    PRELOAD = ''.join(chr(c) for c in range(32, 127))
+
+    def __init__(self, name, size, bold, italic, color, antialias=True, preload=PRELOAD):
+        self.Metrics = GetGlyphMetrics(name, size, bold, italic)
+        self.Color = tuple(color)
+        self.Antialias = antialias
+        self.Atlas = pygame.Surface((self.ATLAS_WIDTH, self.Metrics.Height), pygame.SRCALPHA)
+        self._glyphs = {}
+        self._x = 0
+        self._y = 0
+        self._rowHeight = 0
+        for char in preload:
+            self._glyph(char)
+
+    def _grow(self, height):
+        atlas = pygame.Surface((self.ATLAS_WIDTH, height), pygame.SRCALPHA)
+        atlas.blit(self.Atlas, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        self.Atlas = atlas
+
+    def _glyph(self, char) -> pygame.Rect:
+        rect = self._glyphs.get(char)
+        if rect is not None:
+            return rect
+        glyph = self.Metrics.Font.render(char, self.Antialias, self.Color)
+        width, height = glyph.get_size()
+        if self._x + width > self.ATLAS_WIDTH:
+            self._x = 0
+            self._y += self._rowHeight
+            self._rowHeight = 0
+        if self._y + height > self.Atlas.get_height():
+            self._grow(max(self._y + height, self.Atlas.get_height() * 2))
+        rect = pygame.Rect(self._x, self._y, width, height)
+        # Copy the pixels as they are instead of blending them onto the atlas
+        if glyph.get_flags() & pygame.SRCALPHA:
+            self.Atlas.blit(glyph, rect, special_flags=pygame.BLEND_RGBA_MAX)
+        else:
+            self.Atlas.blit(glyph, rect)
+        self._x += width
+        self._rowHeight = max(self._rowHeight, height)
+        self._glyphs[char] = rect
+        return rect
+
+    def Size(self, text) -> tuple[int, int]:
+        return self.Metrics.Size(text)
+
+    def Draw(self, surface, pos, text) -> pygame.Rect:
+        """ Draws text with its top left corner at pos. Returns the covered rect. """
+        x, y = pos
+        offsets = self.Metrics.Offsets(text)
+        atlas = self.Atlas
+        glyph = self._glyph
+        surface.blits([(atlas, (x + offset, y), glyph(char))
+                       for char, offset in zip(text, offsets)], doreturn=False)
+        return pygame.Rect(x, y, offsets[-1], self.Metrics.Height)
+
+
+@lru_cache(maxsize=64)
+def _get_glyph_atlas(name, size, bold, italic, color, antialias) -> GlyphAtlas:
+    return GlyphAtlas(name, size, bold, italic, color, antialias)
+
+def GetGlyphAtlas(name, size, bold, italic, color, antialias=True) -> GlyphAtlas:
+    return _get_glyph_atlas(name, size, bold, italic, tuple(color), antialias)
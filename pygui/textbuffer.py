@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+
+class GapBuffer:
+    """ Text buffer with a gap at the last edit position. Inserting and deleting
+    at the gap does not move the rest of the text, so typing and deleting at
+    the cursor costs the same regardless of the length of the text. """
+    def __init__(self, text='', gap=64):
+        self._minGap = gap
+        self._chars = list(text) + [''] * gap
+        self._gapStart = len(text)
+        self._gapEnd = len(self._chars)
+        self.Version = 0
+        self._text = text
+
+    def __len__(self):
+        return len(self._chars) - (self._gapEnd - self._gapStart)
+
+    def __str__(self):
+        return self.GetText()
+
+    def _move_gap(self, pos):
+        chars = self._chars
+        if pos < self._gapStart:
+            count = self._gapStart - pos
+            chars[self._gapEnd - count:self._gapEnd] = chars[pos:self._gapStart]
+            self._gapStart = pos
+            self._gapEnd -= count
+        elif pos > self._gapStart:
+            count = pos - self._gapStart
+            chars[self._gapStart:pos] = chars[self._gapEnd:self._gapEnd + count]
+            self._gapStart = pos
+            self._gapEnd += count
+
+    def _reserve(self, count):
+        if self._gapEnd - self._gapStart >= count:
+            return
+        extra = max(count, len(self._chars), self._minGap)
+        self._chars[self._gapEnd:self._gapEnd] = [''] * extra
+        self._gapEnd += extra
+
+    def _changed(self):
+        self.Version += 1
+        self._text = None
+
+    def Insert(self, pos, text):
+        """ Inserts text before the character at pos. """
+        self._move_gap(pos)
+        self._reserve(len(text))
+        end = self._gapStart + len(text)
+        self._chars[self._gapStart:end] = list(text)
+        self._gapStart = end
+        self._changed()
+
+    def Delete(self, pos, count=1):
+        """ Deletes count characters starting at pos. """
+        count = min(count, len(self) - pos)
+        if count <= 0:
+            return
+        self._move_gap(pos)
+        self._gapEnd += count
+        self._changed()
+
+    def Replace(self, pos, text):
+        """ Overwrites the characters from pos with text, extending the text if
+        it reaches past the end. """
+        self.Delete(pos, len(text))
+        self.Insert(pos, text)
+
+    def SetText(self, text):
+        self._chars = list(text) + [''] * self._minGap
+        self._gapStart = len(text)
+        self._gapEnd = len(self._chars)
+        self._changed()
+        self._text = text
+
+    def GetText(self) -> str:
+        """ Returns the whole text. The string is kept until the next edit. """
+        if self._text is None:
+            self._text = ''.join(self._chars[:self._gapStart]) + \
+                ''.join(self._chars[self._gapEnd:])
+        return self._text
+
+    def Slice(self, start, end) -> str:
+        """ Returns the text between start and end without building the whole
+        text. """
+        length = len(self)
+        start = max(0, min(start, length))
+        end = max(start, min(end, length))
+        gapStart = self._gapStart
+        gap = self._gapEnd - gapStart
+        chars = self._chars
+        if end <= gapStart:
+            return ''.join(chars[start:end])
+        if start >= gapStart:
+            return ''.join(chars[start + gap:end + gap])
+        return ''.join(chars[start:gapStart]) + ''.join(chars[self._gapEnd:end + gap])
+
+    def CharAt(self, pos) -> str:
+        if pos >= self._gapStart:
+            pos += self._gapEnd - self._gapStart
+        return self._chars[pos]
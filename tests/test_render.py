@@ -0,0 +1,163 @@
+""" Checks that drawing only the dirty rects gives the same pixels as drawing
+the whole window. """
+import pygame
+import pytest
+
+from pygui import (AbsoluteLayout, Activity, AppContext, GridLayout, LinearLayout,
+                   ScrollView, TextView, View)
+from pygui.guicore import CENTER_HORIZONTAL, CheckboxView
+
+WIDTH = 320
+HEIGHT = 240
+
+
+class OutlinedView(View):
+    def OnMeasure(self, widthSpec, heightSpec):
+        self.SetMeasuredDimension(90, 50)
+
+    def OnDraw(self, surface):
+        self.FillSelf(surface, (128, 0, 128))
+        self.DrawLine(surface, (128, 255, 0), (1, 1), (self.Rect.width - 2, self.Rect.height - 2), 2)
+        self.DrawRect(surface, (255, 255, 0), (0, 0, self.Rect.width, self.Rect.height), 2)
+
+
+class RenderActivity(Activity):
+    def __init__(self, context, name, build):
+        super().__init__(context, name)
+        self._build = build
+
+    def OnInit(self):
+        self.SetContentView(self._build(self))
+
+
+@pytest.fixture
+def app():
+    return AppContext(WIDTH, HEIGHT, headless=True)
+
+
+def start(app, build) -> Activity:
+    app.RegisterActivity(RenderActivity(app, 'test', build))
+    app.StartActivity('test')
+    app.StepFrame()
+    return app.CurrentActivity
+
+
+def pixels(app) -> bytes:
+    return pygame.image.tostring(app.GetSurface(), 'RGB')
+
+
+def full_redraw(app, activity) -> bytes:
+    views = [activity.ContentView]
+    while views:
+        view = views.pop()
+        view._layerValid = False
+        views.extend(getattr(view, 'Children', ()))
+    activity.Invalidate()
+    app.StepFrame()
+    return pixels(app)
+
+
+def assert_partial_matches_full(app, activity):
+    app.StepFrame()
+    partial = pixels(app)
+    assert partial == full_redraw(app, activity)
+
+
+def test_relayout_inside_scrolled_scroll_view(app):
+    def build(activity):
+        context = activity.Context
+        root = LinearLayout(context)
+        activity.scroll = root.AddChild(ScrollView(context, 300, 200))
+        column = activity.scroll.AddChild(LinearLayout(context))
+        activity.rows = []
+        for i in range(40):
+            row = column.AddChild(LinearLayout(context, LinearLayout.HORIZONTAL))
+            first = row.AddChild(TextView(context, f'first view of row {i}'))
+            row.AddChild(TextView(context, 'second'))
+            activity.rows.append(first)
+        return root
+
+    activity = start(app, build)
+    activity.scroll.ScrollTo(0, 300)
+    app.StepFrame()
+    row = next(view for view in activity.rows
+               if view.Rect.top - activity.scroll.ScrollY > 20)
+    # The second view of the row moves left into the area the first one had
+    row.SetText('x')
+    assert_partial_matches_full(app, activity)
+
+
+def test_partial_invalidate_of_outlined_view(app):
+    def build(activity):
+        root = LinearLayout(activity.Context)
+        activity.view = root.AddChild(OutlinedView(activity.Context))
+        return root
+
+    activity = start(app, build)
+    activity.view.Invalidate(pygame.Rect(10, 7, 31, 13))
+    assert_partial_matches_full(app, activity)
+
+
+def test_moving_view_over_others(app):
+    def build(activity):
+        context = activity.Context
+        layout = AbsoluteLayout(context)
+        for i in range(6):
+            view = layout.AddChild(CheckboxView(context, checked=True))
+            view.SetPosition(20 + 7 * i, 30 + 5 * i)
+        activity.outlined = layout.AddChild(OutlinedView(context))
+        activity.outlined.SetPosition(40, 60)
+        activity.moved = layout.AddChild(CheckboxView(context, checked=True))
+        activity.moved.SetPosition(45, 40)
+        return layout
+
+    activity = start(app, build)
+    for x, y in ((53, 47), (61, 75), (90, 90)):
+        activity.moved.SetPosition(x, y)
+        assert_partial_matches_full(app, activity)
+
+
+def test_scrolling_strips(app):
+    def build(activity):
+        context = activity.Context
+        root = LinearLayout(context)
+        activity.scroll = root.AddChild(ScrollView(context, 200, 150))
+        column = activity.scroll.AddChild(LinearLayout(context))
+        for i in range(30):
+            row = column.AddChild(LinearLayout(context, LinearLayout.HORIZONTAL))
+            row.AddChild(CheckboxView(context, checked=i % 2 == 0))
+            row.AddChild(OutlinedView(context))
+        return root
+
+    activity = start(app, build)
+    for dy in (7, 13, 40, -9):
+        activity.scroll.ScrollBy(0, dy)
+        assert_partial_matches_full(app, activity)
+
+
+def test_relayout_of_grid_with_spans(app):
+    def build(activity):
+        context = activity.Context
+        grid = GridLayout(context, 3, 3)
+        activity.cells = [grid.AddChild(TextView(context, f'cell {i}')) for i in range(4)]
+        activity.wide = grid.AddChild(TextView(context, 'spans two columns'), columnSpan=2)
+        grid.AddChild(CheckboxView(context, checked=True))
+        return grid
+
+    activity = start(app, build)
+    activity.cells[0].SetText('a much longer first cell')
+    assert_partial_matches_full(app, activity)
+    activity.wide.SetText('x')
+    assert_partial_matches_full(app, activity)
+
+
+def test_gravity_change_redraws(app):
+    def build(activity):
+        root = LinearLayout(activity.Context)
+        activity.text = root.AddChild(TextView(activity.Context, 'centered'))
+        activity.text.SetMinDimension(200, 20)
+        return root
+
+    activity = start(app, build)
+    activity.text.SetGravity(CENTER_HORIZONTAL)
+    assert_partial_matches_full(app, activity)